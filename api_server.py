@@ -9,9 +9,10 @@ import socketserver
 import json
 import os
 import sys
-import urllib.parse
 from datetime import datetime, timedelta
 import logging
+import async_server
+import lab_http
 
 # Configure logging
 logging.basicConfig(
@@ -24,8 +25,48 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class LabManagementAPIHandler(http.server.SimpleHTTPRequestHandler):
-    """Enhanced HTTP request handler with API endpoints"""
+# Compact JSON; lists longer than JSON_BATCH_SIZE are encoded a batch at a time
+JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+JSON_BATCH_SIZE = 500
+
+def json_chunks(value, batch_size=JSON_BATCH_SIZE):
+    """JSON_ENCODER output for value as a series of strings
+
+    Dicts are walked key by key and long lists encoded batch_size elements
+    at a time, so the whole document never exists as one string.
+    """
+    if isinstance(value, dict):
+        separator = '{'
+        for key, item in value.items():
+            yield separator + JSON_ENCODER.encode(str(key)) + ':'
+            yield from json_chunks(item, batch_size)
+            separator = ','
+        yield '}' if separator == ',' else '{}'
+    elif isinstance(value, list) and len(value) > batch_size:
+        separator = '['
+        for start in range(0, len(value), batch_size):
+            yield separator + ','.join([JSON_ENCODER.encode(item) for item in value[start:start + batch_size]])
+            separator = ','
+        yield ']'
+    else:
+        yield JSON_ENCODER.encode(value)
+
+# API route table: (method, path, handler method)
+ROUTES = lab_http.Router([
+    ('GET', '/api/inventory/current', 'get_current_inventory'),
+    ('GET', '/api/inventory/archived', 'get_archived_inventory'),
+    ('GET', '/api/inventory/all', 'get_all_inventory'),
+    ('GET', '/api/inventory/notifications', 'get_notification_data'),
+    ('GET', '/api/health', 'health_check'),
+])
+
+class LabManagementAPIHandler(lab_http.RouterMixin, lab_http.KeepAliveMixin, lab_http.StaticAssetMixin,
+                               lab_http.CompressionMixin, lab_http.ConditionalGetMixin,
+                               http.server.SimpleHTTPRequestHandler):
+    """Enhanced HTTP request handler with API endpoints (HTTP/1.1 keep-alive, gzip, ETags)"""
+    
+    router = ROUTES
+    inventory_file = 'inventory_data.json'
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -40,41 +81,28 @@ class LabManagementAPIHandler(http.server.SimpleHTTPRequestHandler):
     def do_OPTIONS(self):
         """Handle preflight CORS requests"""
         self.send_response(200)
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def do_GET(self):
         """Handle GET requests - both API and static files"""
-        parsed_path = urllib.parse.urlparse(self.path)
-        
-        # API endpoints
-        if parsed_path.path.startswith('/api/'):
-            self.handle_api_request(parsed_path)
+        if self.dispatch():
+            return
+        if self.path.startswith('/api/'):
+            self.send_error_response(404, "API endpoint not found")
         else:
             # Serve static files (existing functionality)
             super().do_GET()
     
-    def handle_api_request(self, parsed_path):
-        """Handle API requests"""
-        try:
-            if parsed_path.path == '/api/inventory/current':
-                self.get_current_inventory()
-            elif parsed_path.path == '/api/inventory/archived':
-                self.get_archived_inventory()
-            elif parsed_path.path == '/api/inventory/all':
-                self.get_all_inventory()
-            elif parsed_path.path == '/api/inventory/notifications':
-                self.get_notification_data()
-            elif parsed_path.path == '/api/health':
-                self.health_check()
-            else:
-                self.send_error_response(404, "API endpoint not found")
-        except Exception as e:
-            logger.error(f"API error: {e}")
-            self.send_error_response(500, f"Internal server error: {str(e)}")
+    def send_route_error(self, status, message):
+        self.send_error_response(status, message)
     
     def get_current_inventory(self):
         """Get current inventory items from localStorage simulation or fallback"""
         try:
+            version = self.inventory_version()
+            if version and self.send_not_modified(version):
+                return
             data = self.read_inventory_data()
             current_items = data.get('currentItems', [])
             
@@ -85,7 +113,7 @@ class LabManagementAPIHandler(http.server.SimpleHTTPRequestHandler):
                 'timestamp': datetime.now().isoformat()
             }
             
-            self.send_json_response(response_data)
+            self.send_json_response(response_data, version=version)
             logger.info(f"Served current inventory: {len(current_items)} items")
             
         except Exception as e:
@@ -95,6 +123,9 @@ class LabManagementAPIHandler(http.server.SimpleHTTPRequestHandler):
     def get_archived_inventory(self):
         """Get archived inventory items"""
         try:
+            version = self.inventory_version()
+            if version and self.send_not_modified(version):
+                return
             data = self.read_inventory_data()
             archived_items = data.get('archivedItems', [])
             
@@ -105,7 +136,7 @@ class LabManagementAPIHandler(http.server.SimpleHTTPRequestHandler):
                 'timestamp': datetime.now().isoformat()
             }
             
-            self.send_json_response(response_data)
+            self.send_json_response(response_data, version=version)
             logger.info(f"Served archived inventory: {len(archived_items)} items")
             
         except Exception as e:
@@ -115,6 +146,9 @@ class LabManagementAPIHandler(http.server.SimpleHTTPRequestHandler):
     def get_all_inventory(self):
         """Get both current and archived inventory items"""
         try:
+            version = self.inventory_version()
+            if version and self.send_not_modified(version):
+                return
             data = self.read_inventory_data()
             current_items = data.get('currentItems', [])
             archived_items = data.get('archivedItems', [])
@@ -133,7 +167,7 @@ class LabManagementAPIHandler(http.server.SimpleHTTPRequestHandler):
                 'timestamp': datetime.now().isoformat()
             }
             
-            self.send_json_response(response_data)
+            self.send_json_response(response_data, version=version)
             logger.info(f"Served all inventory: {len(current_items)} current, {len(archived_items)} archived")
             
         except Exception as e:
@@ -243,7 +277,7 @@ class LabManagementAPIHandler(http.server.SimpleHTTPRequestHandler):
         
         # Try to read from fallback JSON files
         try:
-            current_file = 'inventory_data.json'
+            current_file = self.inventory_file
             if os.path.exists(current_file):
                 with open(current_file, 'r', encoding='utf-8') as f:
                     file_data = json.load(f)
@@ -258,14 +292,31 @@ class LabManagementAPIHandler(http.server.SimpleHTTPRequestHandler):
         
         return data
     
-    def send_json_response(self, data, status_code=200):
-        """Send JSON response"""
+    def inventory_version(self):
+        """(tag, mtime) of the inventory data file, or None if there is none
+
+        Only the file's metadata is read, so an unchanged inventory can be
+        answered with 304 without loading it.
+        """
+        try:
+            st = os.stat(self.inventory_file)
+        except OSError:
+            return None
+        return f'{st.st_mtime_ns:x}-{st.st_size:x}', st.st_mtime
+    
+    def send_json_response(self, data, status_code=200, version=None):
+        """Send compact JSON, compressed if the client accepts it
+
+        Large responses are encoded and sent in chunks (chunked transfer
+        encoding) instead of as one string. version (tag, mtime) adds
+        ETag/Last-Modified for conditional GETs.
+        """
+        body = lab_http.StreamedBody(chunk.encode('utf-8') for chunk in json_chunks(data))
         self.send_response(status_code)
         self.send_header('Content-Type', 'application/json; charset=utf-8')
-        self.end_headers()
-        
-        json_data = json.dumps(data, indent=2, ensure_ascii=False)
-        self.wfile.write(json_data.encode('utf-8'))
+        if version is not None:
+            self.send_validators(version)
+        self.send_body(body)
     
     def send_error_response(self, status_code, message):
         """Send error response"""
@@ -276,14 +327,26 @@ class LabManagementAPIHandler(http.server.SimpleHTTPRequestHandler):
         }
         self.send_json_response(error_data, status_code)
 
-def run_server(port=8084):
-    """Run the enhanced HTTP server with API endpoints"""
+def run_server(port=8084, use_asyncio=False):
+    """Run the enhanced HTTP server with API endpoints
+
+    use_asyncio serves every socket from one event loop (async_server.py)
+    instead of one blocking request at a time.
+    """
     try:
         # Change to the directory containing the web files
         script_dir = os.path.dirname(os.path.abspath(__file__))
         os.chdir(script_dir)
         
-        with socketserver.TCPServer(("", port), LabManagementAPIHandler) as httpd:
+        # Web files are served from memory, compressed once
+        lab_http.static_assets.preload(script_dir)
+        
+        if use_asyncio:
+            httpd = async_server.AsyncHTTPServer(("", port), LabManagementAPIHandler)
+        else:
+            httpd = socketserver.TCPServer(("", port), LabManagementAPIHandler)
+        
+        with httpd:
             print(f"🔬 AMTC Lab Management System with API")
             print(f"📊 Server running at: http://localhost:{port}")
             print(f"🌐 Web App: http://localhost:{port}")
@@ -316,12 +379,13 @@ def run_server(port=8084):
         logger.error(f"Unexpected server error: {e}")
 
 if __name__ == "__main__":
-    # Get port from command line argument or use default
+    # Get port from command line argument or use default; --async selects the asyncio engine
+    args = [arg for arg in sys.argv[1:] if arg != '--async']
     port = 8084
-    if len(sys.argv) > 1:
+    if args:
         try:
-            port = int(sys.argv[1])
+            port = int(args[0])
         except ValueError:
             print("❌ Invalid port number. Using default port 8084.")
     
-    run_server(port)
\ No newline at end of file
+    run_server(port, use_asyncio='--async' in sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+AMTC Lab Management System - asyncio HTTP engine
+Serves any http.server request handler class (BasicLabServer,
+LabManagementAPIHandler) from one asyncio event loop. The loop waits on
+every socket; only complete requests are handed to a small thread pool,
+where the handler (and its blocking SQLite work) runs. Idle, polling and
+slow connections therefore cost no thread.
+"""
+
+import io
+import os
+import socket
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from lab_http import EVENT_BUFFER_BYTES, KEEPALIVE_TIMEOUT, MAX_BULK_BODY_BYTES, MAX_KEEPALIVE_REQUESTS, REQUEST_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_WORKERS = 16             # threads running request handlers
+LISTEN_BACKLOG = 512
+MAX_HEADER_BYTES = 64 * 1024      # request line + headers
+MAX_BODY_BYTES = MAX_BULK_BODY_BYTES # largest accepted request body (per-route limits are lower)
+SHUTDOWN_TIMEOUT = 10             # seconds open connections get to finish on shutdown
+FLUSH_BYTES = 64 * 1024           # response bytes buffered before they are handed to the loop
+SENDFILE_BYTES = 1024 * 1024      # file bytes per loop.sendfile() call
+
+class RequestError(Exception):
+    """A request the engine rejects before it reaches the handler"""
+    def __init__(self, status, reason):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+
+class LoopWriter:
+    """wfile for a handler running in the thread pool
+
+    Writes collect in memory; past FLUSH_BYTES they are handed to the event
+    loop and the handler thread waits until the socket has taken them. A
+    streamed (chunked) response therefore goes out as it is produced, with
+    at most about FLUSH_BYTES of it held here, while a small one stays a
+    single write. sendfile() sends large static files without copying
+    them through Python. Whatever is left at the end is
+    returned by getvalue().
+    """
+
+    def __init__(self, loop, writer):
+        self.loop = loop
+        self.writer = writer
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= FLUSH_BYTES:
+            self.push()
+        return len(data)
+    
+    def push(self):
+        """Hand everything buffered to the loop now and wait until it is sent"""
+        if self.buffer:
+            data = bytes(self.buffer)
+            self.buffer.clear()
+            # A client that stops reading for REQUEST_TIMEOUT releases the thread
+            asyncio.run_coroutine_threadsafe(self.send(data), self.loop).result(REQUEST_TIMEOUT)
+
+    async def send(self, data):
+        self.writer.write(data)
+        await self.writer.drain()
+    
+    def sendfile(self, file):
+        """Send an open file from its current position with the loop's sendfile (zero-copy)"""
+        self.push()
+        offset = file.tell()
+        size = os.fstat(file.fileno()).st_size
+        while offset < size:
+            sent = asyncio.run_coroutine_threadsafe(
+                self.loop.sendfile(self.writer.transport, file, offset, min(SENDFILE_BYTES, size - offset)),
+                self.loop).result(REQUEST_TIMEOUT)
+            if not sent:
+                break
+            offset += sent
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return bytes(self.buffer)
+
+class LoopSubscriber:
+    """A lab_http.EventBroadcaster subscriber writing to a connection on the event loop
+
+    send() is called from the broadcaster thread and only schedules
+    deliver() on the loop, since transports are not thread-safe. A client
+    that has gone, or lets EVENT_BUFFER_BYTES pile up unread, is
+    unsubscribed from there.
+    """
+
+    def __init__(self, loop, writer, broadcaster):
+        self.loop = loop
+        self.writer = writer
+        self.broadcaster = broadcaster
+        self.gone = False
+
+    def send(self, data):
+        try:
+            self.loop.call_soon_threadsafe(self.deliver, data)
+        except RuntimeError:
+            return False  # loop closed
+        return True
+
+    def deliver(self, data):
+        if self.gone:
+            return
+        transport = self.writer.transport
+        if transport.is_closing() or transport.get_write_buffer_size() > EVENT_BUFFER_BYTES:
+            self.gone = True
+            self.broadcaster.unsubscribe(self)
+            return
+        self.writer.write(data)
+
+    def close(self):
+        try:
+            self.loop.call_soon_threadsafe(self.writer.close)
+        except RuntimeError:
+            pass
+
+def run_handler(handler_class, raw_request, client_address, server, requests_left=MAX_KEEPALIVE_REQUESTS,
+                wfile=None):
+    """Run one complete, buffered request through handler_class
+
+    The handler reads the request from memory and writes its response to
+    wfile (memory by default), exactly as it would to a socket.
+    requests_left counts this request, so lab_http.KeepAliveMixin can
+    announce the connection's last response. Returns (response bytes still
+    in wfile, whether the connection should close, the handler's
+    event_subscription: (broadcaster, position) for an event stream).
+    """
+    handler = handler_class.__new__(handler_class)
+    handler.request = None
+    handler.client_address = client_address
+    handler.server = server
+    handler.directory = os.getcwd()  # set by SimpleHTTPRequestHandler.__init__
+    handler.rfile = io.BytesIO(raw_request)
+    handler.wfile = wfile if wfile is not None else io.BytesIO()
+    handler.close_connection = True
+    handler.requests_left = requests_left
+    handler.handle_one_request()
+    return handler.wfile.getvalue(), handler.close_connection, getattr(handler, 'event_subscription', None)
+
+def _content_length(head):
+    """Content-Length of a raw request head (0 when absent)"""
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            try:
+                length = int(value.strip())
+            except ValueError:
+                raise RequestError(400, 'Bad Content-Length')
+            if length < 0:
+                raise RequestError(400, 'Bad Content-Length')
+            if length > MAX_BODY_BYTES:
+                raise RequestError(413, 'Request body too large')
+            return length
+    return 0
+
+def _error_response(status, reason):
+    body = f'{{"success": false, "error": "{reason}"}}'.encode('utf-8')
+    return (f'HTTP/1.1 {status} {reason}\r\n'
+            'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Connection: close\r\n\r\n').encode('latin-1') + body
+
+class AsyncHTTPServer:
+    """asyncio HTTP server with the socketserver methods run_server() uses
+
+    serve_forever() runs the event loop until shutdown() is called from
+    another thread (or Ctrl+C). server_close() closes the listening socket
+    and waits for requests still running in the thread pool.
+    """
+
+    def __init__(self, server_address, handler_class, workers=EXECUTOR_WORKERS):
+        self.handler_class = handler_class
+        self.socket = socket.create_server(server_address, backlog=LISTEN_BACKLOG)
+        self.server_address = self.socket.getsockname()[:2]
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='http-worker')
+        self.loop = None
+        self.stopping = None
+        self.stopped = threading.Event()
+        self.connections = {}  # task -> StreamWriter
+        self.busy = set()      # tasks with a request in the thread pool
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server_close()
+
+    def serve_forever(self):
+        self.stopped.clear()
+        try:
+            asyncio.run(self.serve())
+        finally:
+            self.stopped.set()
+
+    async def serve(self):
+        """Accept connections until shutdown()"""
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        server = await asyncio.start_server(self.handle_connection, sock=self.socket, limit=MAX_HEADER_BYTES)
+        async with server:
+            await self.stopping.wait()
+        
+        # Close idle connections; ones with a request in flight finish it first
+        for task, writer in self.connections.items():
+            if task not in self.busy:
+                writer.transport.abort()
+        if self.connections:
+            await asyncio.wait(list(self.connections), timeout=SHUTDOWN_TIMEOUT)
+
+    def shutdown(self):
+        """Stop serve_forever() and wait for it to return (call from another thread)"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stopping.set)
+            self.stopped.wait()
+
+    def server_close(self):
+        self.socket.close()
+        self.executor.shutdown(wait=True)
+
+    async def read_request(self, reader, timeout):
+        """Read one request (head and body); None when the client closed the connection"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise RequestError(400, 'Incomplete request')
+            return None
+        except asyncio.LimitOverrunError:
+            raise RequestError(431, 'Request header fields too large')
+
+        length = _content_length(head)
+        body = await asyncio.wait_for(reader.readexactly(length), REQUEST_TIMEOUT) if length else b''
+        return head + body
+
+    async def follow_events(self, reader, writer, broadcaster, position):
+        """Leave an event stream's connection to its broadcaster until the client goes"""
+        subscriber = LoopSubscriber(self.loop, writer, broadcaster)
+        if not broadcaster.subscribe(subscriber, position):
+            return
+        try:
+            while await reader.read(4096):
+                pass
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until either side closes it"""
+        client_address = writer.get_extra_info('peername')[:2]
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        timeout = REQUEST_TIMEOUT
+        try:
+            for served in range(MAX_KEEPALIVE_REQUESTS):
+                raw_request = await self.read_request(reader, timeout)
+                if raw_request is None:
+                    break
+
+                self.busy.add(task)
+                try:
+                    response, close, subscription = await self.loop.run_in_executor(
+                        self.executor, run_handler, self.handler_class, raw_request, client_address, self,
+                        MAX_KEEPALIVE_REQUESTS - served, LoopWriter(self.loop, writer))
+                    writer.write(response)
+                    await writer.drain()
+                finally:
+                    self.busy.discard(task)
+                if subscription is not None:
+                    await self.follow_events(reader, writer, *subscription)
+                    break
+                if close or self.stopping.is_set():
+                    break
+                timeout = KEEPALIVE_TIMEOUT
+        except RequestError as e:
+            writer.write(_error_response(e.status, e.reason))
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"Error serving {client_address[0]}: {e}")
+        finally:
+            del self.connections[task]
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
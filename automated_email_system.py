@@ -16,7 +16,9 @@ Date: September 2025
 """
 
 import json
+import gzip
 import smtplib
+import http.client
 import logging
 import os
 import sqlite3
@@ -43,10 +45,17 @@ logger = logging.getLogger(__name__)
 class AutomatedInventoryNotifier:
     """Fully automated email notification system for AMTC Lab Inventory"""
     
+    # API server polled for inventory data (api_server.py)
+    api_host = 'localhost'
+    api_port = 8084
+    
     def __init__(self, config_file: str = 'email_config.json'):
         """Initialize the automated notifier"""
         self.config = self.load_config(config_file)
         self.smtp_server = None
+        self.api_connection = None  # kept alive between polls
+        self.api_etag = None        # ETag of api_items, sent as If-None-Match
+        self.api_items = None
         self.notification_history = self.load_notification_history()
         
     def load_config(self, config_file: str) -> Dict[str, Any]:
@@ -118,25 +127,52 @@ class AutomatedInventoryNotifier:
             logger.error(f"Error reading inventory data: {e}")
             return []
     
+    def api_get(self, path: str, headers: Optional[Dict[str, str]] = None) -> http.client.HTTPResponse:
+        """GET a path from the API server over the kept-alive connection
+
+        A connection the server has since closed (idle timeout, request
+        cap) is reopened once.
+        """
+        for attempt in range(2):
+            if self.api_connection is None:
+                self.api_connection = http.client.HTTPConnection(self.api_host, self.api_port, timeout=5)
+            try:
+                self.api_connection.request('GET', path, headers={'Accept-Encoding': 'gzip', **(headers or {})})
+                return self.api_connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.api_connection.close()
+                self.api_connection = None
+                if attempt:
+                    raise
+    
     def fetch_from_api_endpoint(self) -> Optional[List[Dict[str, Any]]]:
         """Fetch inventory data from the API endpoint"""
         try:
-            import urllib.request
-            import urllib.error
-            
-            api_url = 'http://localhost:8084/api/inventory/current'
             logger.info("Attempting to fetch data from API endpoint...")
             
-            with urllib.request.urlopen(api_url, timeout=5) as response:
-                if response.status == 200:
-                    data = json.loads(response.read().decode('utf-8'))
-                    if data.get('status') == 'success':
-                        items = data.get('items', [])
-                        logger.info(f"✅ Successfully loaded {len(items)} items from API endpoint")
-                        return items
-                        
-        except (urllib.error.URLError, urllib.error.HTTPError, ConnectionError) as e:
+            # Unchanged since the last poll: the server answers 304 without reading the data
+            conditional = {'If-None-Match': self.api_etag} if self.api_etag and self.api_items else None
+            response = self.api_get('/api/inventory/current', conditional)
+            body = response.read()
+            if response.status == 304:
+                logger.info(f"✅ Inventory unchanged since last poll ({len(self.api_items)} items)")
+                return self.api_items
+            if response.getheader('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            if response.status == 200:
+                data = json.loads(body.decode('utf-8'))
+                if data.get('status') == 'success':
+                    items = data.get('items', [])
+                    self.api_etag = response.getheader('ETag')
+                    self.api_items = items
+                    logger.info(f"✅ Successfully loaded {len(items)} items from API endpoint")
+                    return items
+                    
+        except (OSError, http.client.HTTPException) as e:
             logger.warning(f"Could not connect to API endpoint: {e}")
+            if self.api_connection is not None:
+                self.api_connection.close()
+                self.api_connection = None
         except Exception as e:
             logger.warning(f"Error reading from API: {e}")
             
@@ -8,77 +8,278 @@ import http.server
 import socketserver
 import os
 import json
+import queue
+import socket
+import selectors
 import smtplib
 import logging
+import argparse
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-from urllib.parse import parse_qs, urlparse
 import threading
+import time
 import database  # Import our database module
+import async_server
+import lab_http
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class BasicLabServer(http.server.SimpleHTTPRequestHandler):
-    """Basic server for AMTC Lab Management System"""
+# Concurrency settings (see run_server)
+SERVER_MODES = ('pool', 'threads', 'single', 'asyncio')
+SERVER_WORKERS = 16        # request threads in 'pool' and 'asyncio' modes
+SERVER_QUEUE_DEPTH = 64    # accepted connections waiting for a worker before 503s
+SHUTDOWN_TIMEOUT = 10      # seconds to let in-flight requests finish on exit
+
+SLOW_REQUEST_SECONDS = 1.0 # API requests slower than this are logged
+
+# Route table: (method, path, handler method[, request body limit])
+ROUTES = lab_http.Router([
+    ('GET', '/api/items', 'handle_get_items'),
+    ('GET', '/api/items/tag/{unique_id}', 'handle_get_item_by_tag'),
+    ('GET', '/api/archived', 'handle_get_archived'),
+    ('GET', '/api/stats', 'handle_get_stats'),
+    ('GET', '/api/search', 'handle_search'),
+    ('GET', '/api/changes', 'handle_get_changes'),
+    ('GET', '/api/cache', 'handle_get_cache'),
+    ('GET', '/api/timings', 'handle_get_timings'),
+    ('GET', '/api/events', 'handle_events'),
+    ('POST', '/send-notification', 'handle_email_notification'),
+    ('POST', '/api/items', 'handle_add_item'),
+    ('POST', '/api/items/update', 'handle_update_item'),
+    ('POST', '/api/items/delete', 'handle_delete_item'),
+    ('POST', '/api/items/archive', 'handle_archive_item'),
+    ('POST', '/api/items/import', 'handle_import_items', lab_http.MAX_BULK_BODY_BYTES),
+    ('POST', '/api/items/batch/archive', 'handle_batch_archive', lab_http.MAX_BULK_BODY_BYTES),
+    ('POST', '/api/items/batch/delete', 'handle_batch_delete', lab_http.MAX_BULK_BODY_BYTES),
+    ('POST', '/api/items/batch/update', 'handle_batch_update', lab_http.MAX_BULK_BODY_BYTES),
+    ('POST', '/api/batch', 'handle_batch', lab_http.MAX_BULK_BODY_BYTES),
+])
+
+def log_slow_request(route, status, seconds):
+    if seconds >= SLOW_REQUEST_SECONDS:
+        logger.warning(f"Slow request: {route.method} {route.pattern} -> {status} in {seconds:.2f}s")
+
+ROUTES.timing_hooks.append(log_slow_request)
+
+# Event stream names for change log operations (see handle_events)
+ITEM_EVENTS = {'insert': 'added', 'update': 'updated', 'archive': 'archived', 'delete': 'deleted'}
+
+def item_events(seq):
+    """Event-stream messages for the changes after seq, and the seq they lead to"""
+    messages = []
+    has_more = database.change_version()[0] > seq
+    while has_more:
+        result = database.get_changes(seq)
+        if not result['success']:
+            logger.error(f"Error reading changes for event stream: {result['message']}")
+            break
+        if result['snapshot']:
+            seq = result['lastSeq']
+            return [lab_http.sse_message('reset', {'lastSeq': seq}, seq)], seq
+        messages += [lab_http.sse_message(ITEM_EVENTS[change['op']], change, change['seq'])
+                     for change in result['changes']]
+        seq = result['lastSeq']
+        has_more = result['hasMore']
+    return messages, seq
+
+# Every open /api/events stream, written by one thread; committed writes wake it
+EVENTS = lab_http.EventBroadcaster(item_events)
+database.add_write_listener(lambda tables: EVENTS.signal())
+
+class BasicLabServer(lab_http.RouterMixin, lab_http.KeepAliveMixin, lab_http.StaticAssetMixin,
+                     lab_http.CompressionMixin, lab_http.ConditionalGetMixin, lab_http.EventStreamMixin,
+                     http.server.SimpleHTTPRequestHandler):
+    """Basic server for AMTC Lab Management System (keep-alive, gzip, ETags, live events, cached static files)"""
+    
+    router = ROUTES
     
     def do_POST(self):
         """Handle POST requests for email notifications and database operations"""
-        if self.path == '/send-notification':
-            self.handle_email_notification()
-        elif self.path == '/api/items':
-            self.handle_add_item()
-        elif self.path == '/api/items/update':
-            self.handle_update_item()
-        elif self.path == '/api/items/delete':
-            self.handle_delete_item()
-        elif self.path == '/api/items/archive':
-            self.handle_archive_item()
-        elif self.path == '/api/items/import':
-            self.handle_import_items()
-        else:
-            self.send_response(404)
-            self.end_headers()
+        if not self.dispatch():
+            self.send_json_response({'success': False, 'error': 'Not found'}, 404)
     
     def do_GET(self):
         """Handle GET requests - serve static files and API calls"""
-        if self.path == '/api/items':
-            self.handle_get_items()
-        elif self.path == '/api/archived':
-            self.handle_get_archived()
-        else:
+        if not self.dispatch():
             # Serve static files from the current directory
             return super().do_GET()
     
+    def send_route_error(self, status, message):
+        self.send_json_response({'success': False, 'error': message}, status)
+    
     # ==================== DATABASE API HANDLERS ====================
     
     def handle_get_items(self):
-        """Get all inventory items from database"""
+        """Get inventory items from database, filtered by the query string if given"""
         try:
-            result = database.get_all_items()
+            params = self.query
+            ndjson = self.wants_ndjson(params)
+            
+            if self.is_page_request(params):
+                result = self.get_page(params, archived=False)
+            elif params or ndjson:
+                # Filtered results are streamed from SQLite as they are encoded
+                order_by = params.pop('orderBy', None)
+                limit = params.pop('limit', None)
+                try:
+                    chunks = database.stream_items(False, params, order_by, limit, ndjson=ndjson)
+                    return self.send_json_stream(chunks, ndjson=ndjson)
+                except ValueError as e:
+                    # Unknown filter or orderBy, or a value that does not convert
+                    raise lab_http.HTTPError(400, str(e))
+            else:
+                # Whole inventory: 304 if unchanged, else the pre-encoded cached response
+                version = database.table_version('inventory')
+                if self.send_not_modified(version):
+                    return
+                return self.send_json_bytes(database.get_all_items_json(), memo=True, version=version)
+            
             self.send_json_response(result)
+        except lab_http.HTTPError:
+            raise
         except Exception as e:
             logger.error(f"Error getting items: {e}")
             self.send_json_response({'success': False, 'error': str(e)}, 500)
     
+    def handle_get_item_by_tag(self, unique_id):
+        """Get the inventory item with a given unique ID (tag)"""
+        result = database.query_items({'uniqueId': unique_id}, limit=1)
+        if not result['success']:
+            self.send_json_response(result, 500)
+        elif not result['items']:
+            self.send_json_response({'success': False, 'error': f'No item with tag {unique_id}'}, 404)
+        else:
+            self.send_json_response({'success': True, 'item': result['items'][0].to_dict()})
+    
     def handle_get_archived(self):
-        """Get all archived items from database"""
+        """Get archived items; ?limit=/&after= pages, ?since=/&until= also searches cold tiers"""
         try:
-            result = database.get_all_archived()
+            params = self.query
+            ndjson = self.wants_ndjson(params)
+            
+            if self.is_page_request(params):
+                result = self.get_page(params, archived=True)
+            elif not params and not ndjson:
+                version = database.table_version('archived')
+                if self.send_not_modified(version):
+                    return
+                return self.send_json_bytes(database.get_all_archived_json(), memo=True, version=version)
+            else:
+                try:
+                    chunks = database.stream_items(True, since=params.get('since'), until=params.get('until'),
+                                                   ndjson=ndjson)
+                    return self.send_json_stream(chunks, ndjson=ndjson)
+                except ValueError as e:
+                    raise lab_http.HTTPError(400, str(e))
             self.send_json_response(result)
+        except lab_http.HTTPError:
+            raise
         except Exception as e:
             logger.error(f"Error getting archived items: {e}")
             self.send_json_response({'success': False, 'error': str(e)}, 500)
     
+    def handle_get_stats(self):
+        """Get aggregate inventory statistics (counts only, no item rows)"""
+        try:
+            result = database.inventory_stats()
+            self.send_json_response(result)
+        except Exception as e:
+            logger.error(f"Error getting stats: {e}")
+            self.send_json_response({'success': False, 'error': str(e)}, 500)
+    
+    def handle_search(self):
+        """Full-text search: ?q=text[&limit=&offset=&scope=all|inventory|archived]"""
+        params = self.query
+        try:
+            limit = int(params.get('limit', 20))
+            offset = int(params.get('offset', 0))
+        except ValueError:
+            raise lab_http.HTTPError(400, 'limit and offset must be integers')
+        scope = params.get('scope', 'all')
+        if scope not in database.SEARCH_SCOPES:
+            raise lab_http.HTTPError(400, f'Unknown search scope: {scope}')
+        try:
+            result = database.search_items(params.get('q', ''), limit, offset, scope)
+            self.send_json_response(result)
+        except Exception as e:
+            logger.error(f"Error searching items: {e}")
+            self.send_json_response({'success': False, 'error': str(e)}, 500)
+    
+    def handle_get_changes(self):
+        """Incremental sync: ?since=<seq>[&limit=] (no since, or too old, gives a snapshot)"""
+        params = self.query
+        try:
+            since = params.get('since')
+            since = None if since is None else int(since)
+            limit = int(params.get('limit', database.MAX_CHANGES))
+        except ValueError:
+            raise lab_http.HTTPError(400, 'since and limit must be integers')
+        try:
+            # The answer for a given since/limit only changes when the log grows
+            seq, logged_at = database.change_version()
+            version = (f'changes-{seq}', logged_at)
+            if self.send_not_modified(version):
+                return
+            result = database.get_changes(since, limit)
+            if result['success'] and result['snapshot']:
+                # Pre-encoded from the read cache; its compressed copy is kept until the next write
+                return self.send_json_bytes(database.get_changes_snapshot_json(), memo=True, version=version)
+            self.send_json_response(result, version=version if result['success'] else None)
+        except Exception as e:
+            logger.error(f"Error getting changes: {e}")
+            self.send_json_response({'success': False, 'error': str(e)}, 500)
+    
+    def handle_get_cache(self):
+        """Read cache and static asset cache statistics"""
+        self.send_json_response({'success': True, 'cache': database.cache_info(),
+                                 'static': lab_http.static_assets.info()})
+    
+    def handle_get_timings(self):
+        """Request count and mean/max time per API route since startup"""
+        self.send_json_response({'success': True, 'routes': self.router.stats()})
+    
+    def handle_events(self):
+        """Server-Sent Events: items added, updated, archived and deleted as writes commit
+
+        Each event carries a change log entry, {seq, op, id, item} as in
+        /api/changes, with seq as its event id. The stream starts after
+        the Last-Event-ID header (a reconnect) or ?since=<lastSeq>, else
+        from now. When those changes are no longer logged it sends one
+        'reset' event, and the client should reload everything.
+        """
+        since = self.headers.get('Last-Event-ID') or self.query.get('since')
+        try:
+            seq = int(since) if since else database.change_version()[0]
+        except ValueError:
+            raise lab_http.HTTPError(400, 'since must be a change sequence number')
+        self.send_event_stream(EVENTS, seq)
+    
+    def wants_ndjson(self, params):
+        """True for ?format=ndjson or an Accept: application/x-ndjson header (removes 'format')"""
+        return (params.pop('format', None) == 'ndjson'
+                or 'application/x-ndjson' in self.headers.get('Accept', ''))
+    
+    @staticmethod
+    def is_page_request(params):
+        """True when the query string only asks for keyset pagination (limit/after)"""
+        return bool(params) and set(params) <= {'limit', 'after'}
+    
+    @staticmethod
+    def get_page(params, archived):
+        """database.get_items_page() for ?limit=&after=; a malformed value is a 400"""
+        try:
+            return database.get_items_page(params.get('limit', database.DEFAULT_PAGE_SIZE), params.get('after'),
+                                           archived=archived)
+        except ValueError as e:
+            raise lab_http.HTTPError(400, str(e))
+
     def handle_add_item(self):
         """Add a new item to database"""
+        item = self.json_body()
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            item = json.loads(post_data.decode('utf-8'))
-            
             result = database.add_item(item)
             self.send_json_response(result)
         except Exception as e:
@@ -87,11 +288,8 @@ class BasicLabServer(http.server.SimpleHTTPRequestHandler):
     
     def handle_update_item(self):
         """Update an existing item in database"""
+        data = self.json_body()
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
-            
             item_id = data.get('id')
             updates = data.get('updates')
             
@@ -103,11 +301,8 @@ class BasicLabServer(http.server.SimpleHTTPRequestHandler):
     
     def handle_delete_item(self):
         """Delete an item from database"""
+        data = self.json_body()
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
-            
             item_id = data.get('id')
             result = database.delete_item(item_id)
             self.send_json_response(result)
@@ -117,11 +312,8 @@ class BasicLabServer(http.server.SimpleHTTPRequestHandler):
     
     def handle_archive_item(self):
         """Archive an item (move from inventory to archived)"""
+        data = self.json_body()
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
-            
             item = data.get('item')
             pickup_date = data.get('pickupDate')
             
@@ -133,31 +325,116 @@ class BasicLabServer(http.server.SimpleHTTPRequestHandler):
     
     def handle_import_items(self):
         """Import multiple items at once"""
+        data = self.json_body()
+        if not isinstance(data, dict) or not isinstance(data.get('items', []), list):
+            raise lab_http.HTTPError(400, 'Expected an object with an items list')
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
-            
             items = data.get('items', [])
-            result = database.import_items(items)
+            mode = data.get('mode', 'skip')
+            result = database.import_items(items, mode)
             self.send_json_response(result)
         except Exception as e:
             logger.error(f"Error importing items: {e}")
             self.send_json_response({'success': False, 'error': str(e)}, 500)
     
-    # ==================== EMAIL NOTIFICATION HANDLER ====================
+    def handle_batch_archive(self):
+        """Archive several items in one transaction"""
+        data = self.json_body()
+        try:
+            items = data.get('items', [])
+            pickup_date = data.get('pickupDate')
+            
+            result = database.archive_items(items, pickup_date)
+            self.send_json_response(result)
+        except Exception as e:
+            logger.error(f"Error archiving items: {e}")
+            self.send_json_response({'success': False, 'error': str(e)}, 500)
     
-    def handle_email_notification(self):
-        """Handle email notification requests"""
+    def handle_batch_delete(self):
+        """Delete several items in one transaction"""
+        data = self.json_body()
+        try:
+            ids = data.get('ids', [])
+            result = database.delete_items(ids)
+            self.send_json_response(result)
+        except Exception as e:
+            logger.error(f"Error deleting items: {e}")
+            self.send_json_response({'success': False, 'error': str(e)}, 500)
+    
+    def handle_batch_update(self):
+        """Update several items in one transaction"""
+        data = self.json_body()
+        try:
+            changes = data.get('changes', [])
+            result = database.update_items(changes)
+            self.send_json_response(result)
+        except Exception as e:
+            logger.error(f"Error updating items: {e}")
+            self.send_json_response({'success': False, 'error': str(e)}, 500)
+    
+    def handle_batch(self):
+        """Run an ordered list of operations in one request
+
+        Body: {"operations": [{"op": "update", "id", "updates"},
+        {"op": "archive", "item", "pickupDate"}, {"op": "notify", "type",
+        "item"}, ...], "atomic": true}. The database operations (add,
+        update, delete, archive) run as one transaction via
+        database.run_batch(), skipped when there are none; notify
+        operations are queued only once that has committed. Results come
+        back in request order.
+        """
+        data = self.json_body()
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            if content_length == 0:
-                self.send_json_response({'error': 'No data provided'}, 400)
+            operations = data.get('operations', [])
+            if not isinstance(operations, list):
+                self.send_json_response({'success': False, 'error': 'operations must be a list'}, 400)
                 return
             
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            is_notify = [isinstance(op, dict) and op.get('op') == 'notify' for op in operations]
+            database_ops = [op for op, notify in zip(operations, is_notify) if not notify]
+            if database_ops:
+                result = database.run_batch(database_ops, data.get('atomic', True))
+            else:
+                # Notify-only: nothing to commit, so no trip through the writer queue
+                result = {'success': True, 'committed': True, 'message': '0 of 0 operations succeeded',
+                          'results': []}
+            database_results = iter(result['results'] or
+                                    [{'success': False, 'message': result['message']}] * len(database_ops))
+            
+            results = []
+            for op, notify in zip(operations, is_notify):
+                if not notify:
+                    results.append(next(database_results))
+                elif not result['committed']:
+                    results.append({'op': 'notify', 'success': False, 'message': 'Not sent: batch rolled back'})
+                else:
+                    results.append(self.queue_notification(op))
             
+            self.send_json_response(dict(result, success=all(r['success'] for r in results), results=results))
+        except Exception as e:
+            logger.error(f"Error running batch: {e}")
+            self.send_json_response({'success': False, 'error': str(e)}, 500)
+    
+    def queue_notification(self, data):
+        """Send a {'type', 'item', 'additionalDays'} notification in the background"""
+        notification_type = data.get('type')
+        item = data.get('item')
+        if not notification_type or not item:
+            return {'op': 'notify', 'success': False, 'message': 'Missing notification type or item data'}
+        
+        threading.Thread(
+            target=self.send_email_notification,
+            args=(notification_type, item, data.get('additionalDays')),
+            daemon=True
+        ).start()
+        return {'op': 'notify', 'success': True, 'message': 'Notification queued'}
+    
+    # ==================== EMAIL NOTIFICATION HANDLER ====================
+    
+    def handle_email_notification(self):
+        """Handle email notification requests"""
+        data = self.json_body()
+        try:
             notification_type = data.get('type')
             item = data.get('item')
             
@@ -166,16 +443,10 @@ class BasicLabServer(http.server.SimpleHTTPRequestHandler):
                 return
             
             # Send email notification in background
-            threading.Thread(
-                target=self.send_email_notification,
-                args=(notification_type, item, data.get('additionalDays')),
-                daemon=True
-            ).start()
+            self.queue_notification(data)
             
             self.send_json_response({'success': True, 'message': 'Notification queued'})
             
-        except json.JSONDecodeError:
-            self.send_json_response({'error': 'Invalid JSON data'}, 400)
         except Exception as e:
             logger.error(f"Error handling notification: {e}")
             self.send_json_response({'error': 'Server error'}, 500)
@@ -285,15 +556,48 @@ AMTC Lab Team
         except Exception as e:
             logger.error(f"Error in email notification: {e}")
     
-    def send_json_response(self, data, status_code=200):
-        """Send JSON response"""
+    def send_json_response(self, data, status_code=200, version=None):
+        """Send JSON response (large ones are encoded and sent in chunks)"""
+        self.send_json_stream(database.iter_json(data), status_code, version)
+    
+    def send_json_stream(self, chunks, status_code=200, version=None, ndjson=False):
+        """Send JSON (or NDJSON) produced piece by piece by a generator
+
+        The first lab_http.STREAM_CHUNK_BYTES are produced before the
+        status line, so errors there still reach the caller's except. A
+        body that short gets a Content-Length; a longer one goes out with
+        chunked transfer encoding while the rest is produced.
+        """
+        body = lab_http.StreamedBody(chunks)
+        self.send_json_headers(status_code, version, 'application/x-ndjson' if ndjson else 'application/json')
+        self.send_body(body)
+    
+    def send_json_bytes(self, body, status_code=200, memo=False, version=None):
+        """Send an already encoded JSON body, compressed if the client accepts it
+
+        memo=True for bodies from the database read cache, so their
+        compressed copy is reused until the cache is invalidated.
+        """
+        self.send_json_headers(status_code, version)
+        body = self.encode_body(body, memo)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_json_headers(self, status_code, version=None, content_type='application/json'):
+        """Status line and headers shared by JSON responses
+
+        version (tag, mtime) adds ETag/Last-Modified for conditional GETs.
+        """
         self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Type', content_type)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
+        if version is not None:
+            self.send_validators(version)
+        if status_code >= 400:
+            # The request body may not have been read; don't reuse the connection
+            self.send_header('Connection', 'close')
     
     def do_OPTIONS(self):
         """Handle preflight requests"""
@@ -301,35 +605,273 @@ AMTC Lab Team
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
-def run_server():
-    """Start the basic lab management server"""
-    port = 8000
+class ThreadPoolServer(socketserver.TCPServer):
+    """TCP server that hands connections to a fixed pool of worker threads
+
+    Accepted connections wait in a queue of at most queue_depth; when it
+    is full the client gets an immediate 503 instead of piling up. A
+    worker serves one request per turn: a kept-alive connection is then
+    parked with the idle watcher thread, which queues it again when its
+    next request arrives or closes it after KEEPALIVE_TIMEOUT, so idle
+    browsers hold no worker. Closing the server stops accepting, lets the
+    workers finish the connections already queued, then joins them.
+    """
+    allow_reuse_address = True
+    
+    def __init__(self, server_address, handler_class, workers=SERVER_WORKERS, queue_depth=SERVER_QUEUE_DEPTH):
+        self.request_queue_size = max(queue_depth, 5)  # listen() backlog
+        super().__init__(server_address, handler_class)
+        self.pending = queue.Queue(queue_depth)
+        self.idle = {}               # parked socket -> (client_address, rfile, requests left, deadline)
+        self.idle_lock = threading.Lock()
+        self.to_watch = queue.SimpleQueue()
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.wakeup_send.setblocking(False)
+        self.idle_selector = selectors.DefaultSelector()
+        self.idle_selector.register(self.wakeup_recv, selectors.EVENT_READ)
+        self.watching = True
+        self.watcher = threading.Thread(target=self.watch_idle, name='http-idle-watcher', daemon=True)
+        self.watcher.start()
+        self.workers = [
+            threading.Thread(target=self.process_pending, name=f'http-worker-{n}', daemon=True)
+            for n in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+    
+    def process_request(self, request, client_address):
+        """Queue the connection for a worker, or turn it away when the queue is full"""
+        try:
+            self.pending.put_nowait((request, client_address))
+        except queue.Full:
+            logger.warning(f"Request queue full, rejecting {client_address[0]}")
+            self.reject_request(request)
+            self.shutdown_request(request)
+    
+    def process_pending(self):
+        """Worker thread: serve one request per queued connection until told to stop"""
+        while True:
+            job = self.pending.get()
+            if job is None:
+                return
+            request, client_address = job
+            handler = None
+            try:
+                handler = self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            if getattr(handler, 'idle_state', None) is not None and self.watching:
+                self.park_connection(request, client_address, handler.idle_state)
+            else:
+                self.shutdown_request(request)
+    
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+    
+    def park_connection(self, request, client_address, state):
+        """Hand a kept-alive connection to the idle watcher until its next request"""
+        rfile, requests_left = state
+        try:
+            # A request already buffered (or arriving now) goes straight back in the queue
+            request.setblocking(False)
+            ready = rfile.peek(1)
+            request.settimeout(lab_http.REQUEST_TIMEOUT)
+        except OSError:
+            self.shutdown_request(request)
+            return
+        deadline = time.monotonic() + lab_http.KEEPALIVE_TIMEOUT
+        with self.idle_lock:
+            self.idle[request] = (client_address, rfile, requests_left, deadline)
+        if ready:
+            self.requeue(request)
+        else:
+            self.to_watch.put(request)
+            self.wake_watcher()
+    
+    def resume_connection(self, request):
+        """(rfile, requests left) of a parked connection, for lab_http.KeepAliveMixin"""
+        with self.idle_lock:
+            entry = self.idle.pop(request, None)
+        return entry[1:3] if entry else None
+    
+    def requeue(self, request):
+        """Queue a parked connection whose next request has arrived"""
+        with self.idle_lock:
+            client_address = self.idle[request][0]
+        try:
+            self.pending.put_nowait((request, client_address))
+        except queue.Full:
+            logger.warning(f"Request queue full, rejecting {client_address[0]}")
+            self.reject_request(request)
+            self.close_idle(request)
+    
+    def close_idle(self, request):
+        with self.idle_lock:
+            entry = self.idle.pop(request, None)
+        if entry is not None:
+            entry[1].close()
+        self.shutdown_request(request)
+    
+    def wake_watcher(self):
+        try:
+            self.wakeup_send.send(b'\0')
+        except BlockingIOError:
+            pass  # already has wakeups pending
+    
+    def watch_idle(self):
+        """Idle watcher thread: wait on parked sockets, requeue or expire them"""
+        selector = self.idle_selector
+        while self.watching:
+            for key, _ in selector.select(timeout=1.0):
+                if key.fileobj is self.wakeup_recv:
+                    self.wakeup_recv.recv(4096)
+                    continue
+                selector.unregister(key.fileobj)
+                self.requeue(key.fileobj)
+            
+            while True:
+                try:
+                    request = self.to_watch.get_nowait()
+                except queue.Empty:
+                    break
+                selector.register(request, selectors.EVENT_READ)
+            
+            now = time.monotonic()
+            with self.idle_lock:
+                expired = [request for request, entry in self.idle.items()
+                           if entry[3] <= now and request in selector.get_map()]
+            for request in expired:
+                selector.unregister(request)
+                self.close_idle(request)
+        
+        for key in list(selector.get_map().values()):
+            if key.fileobj is not self.wakeup_recv:
+                self.close_idle(key.fileobj)
+        selector.close()
+    
+    @staticmethod
+    def reject_request(request):
+        """Answer 503 without reading the request"""
+        body = json.dumps({'success': False, 'error': 'Server busy, try again'}).encode('utf-8')
+        head = ('HTTP/1.1 503 Service Unavailable\r\n'
+                'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                'Retry-After: 1\r\n'
+                'Connection: close\r\n\r\n').encode('latin-1')
+        try:
+            request.sendall(head + body)
+        except OSError:
+            pass
     
+    def server_close(self):
+        """Stop listening, drain queued connections and join the workers"""
+        super().server_close()
+        self.watching = False
+        self.wake_watcher()
+        self.watcher.join(SHUTDOWN_TIMEOUT)
+        self.wakeup_send.close()
+        self.wakeup_recv.close()
+        for _ in self.workers:
+            self.pending.put(None)
+        for worker in self.workers:
+            worker.join(SHUTDOWN_TIMEOUT)
+
+class ThreadingServer(socketserver.ThreadingTCPServer):
+    """One thread per connection, unbounded"""
+    allow_reuse_address = True
+    daemon_threads = True
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            # The thread ends here; don't leave its database connection to the garbage collector
+            database.close_connection()
+
+class SingleServer(socketserver.TCPServer):
+    """One request at a time"""
+    allow_reuse_address = True
+
+def make_server(port, mode='pool', workers=SERVER_WORKERS, queue_depth=SERVER_QUEUE_DEPTH):
+    """Create the HTTP server for one of SERVER_MODES
+
+    'pool'    - fixed worker pool with a bounded queue (default)
+    'threads' - a new thread per connection, no limit
+    'single'  - one request at a time
+    'asyncio' - one event loop for all sockets, handlers in a worker pool
+    """
+    address = ("", port)
+    if mode == 'pool':
+        return ThreadPoolServer(address, BasicLabServer, workers, queue_depth)
+    if mode == 'threads':
+        return ThreadingServer(address, BasicLabServer)
+    if mode == 'single':
+        return SingleServer(address, BasicLabServer)
+    if mode == 'asyncio':
+        return async_server.AsyncHTTPServer(address, BasicLabServer, workers)
+    raise ValueError(f"Unknown server mode: {mode}")
+
+def run_server(port=8000, mode='pool', workers=SERVER_WORKERS, queue_depth=SERVER_QUEUE_DEPTH):
+    """Start the basic lab management server"""
     # Change to the script directory
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
     
-    # Create server
-    with socketserver.TCPServer(("", port), BasicLabServer) as httpd:
-        print("=" * 60)
-        print("🔬 AMTC Lab Management System - Basic Server")
-        print("=" * 60)
-        print(f"📡 Server running on: http://localhost:{port}")
-        print(f"🌐 Access the lab system: http://localhost:{port}")
-        print("📧 Email notifications: Enabled (configure SMTP settings)")
-        print("💾 Data storage: localStorage (browser-based)")
-        print("🔧 Mode: Basic localhost functionality")
-        print("=" * 60)
-        print("Press Ctrl+C to stop the server")
-        print()
-        
-        try:
-            httpd.serve_forever()
-        except KeyboardInterrupt:
-            print("\n🛑 Server stopped by user")
-            print("Thank you for using AMTC Lab Management System!")
+    # Web files are served from memory, compressed once
+    lab_http.static_assets.preload(script_dir)
+    
+    # Move old pickups out of the hot database without delaying startup
+    threading.Thread(target=database.tier_archive, daemon=True).start()
+    
+    concurrency = {
+        'pool': f"{workers} worker threads, queue depth {queue_depth}",
+        'threads': "thread per connection",
+        'single': "one request at a time",
+        'asyncio': f"asyncio event loop, {workers} handler threads",
+    }[mode]
+    
+    httpd = make_server(port, mode, workers, queue_depth)
+    print("=" * 60)
+    print("🔬 AMTC Lab Management System - Basic Server")
+    print("=" * 60)
+    print(f"📡 Server running on: http://localhost:{port}")
+    print(f"🌐 Access the lab system: http://localhost:{port}")
+    print("📧 Email notifications: Enabled (configure SMTP settings)")
+    print("💾 Data storage: localStorage (browser-based)")
+    print("🔧 Mode: Basic localhost functionality")
+    print(f"🧵 Concurrency: {concurrency}")
+    print("=" * 60)
+    print("Press Ctrl+C to stop the server")
+    print()
+    
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Server stopped by user")
+        print("Thank you for using AMTC Lab Management System!")
+    finally:
+        # Let in-flight requests finish before the database closes
+        EVENTS.close()
+        httpd.server_close()
+        database.close_all_connections()
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='AMTC Lab Management System - Basic Server')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--mode', choices=SERVER_MODES, default='pool',
+                       help='pool: bounded worker pool, threads: thread per connection, '
+                            'single: one at a time, asyncio: event loop with a handler pool')
+    parser.add_argument('--workers', type=int, default=SERVER_WORKERS,
+                       help='Worker threads in pool mode')
+    parser.add_argument('--queue-depth', type=int, default=SERVER_QUEUE_DEPTH,
+                       help='Connections allowed to wait for a worker before new ones get 503')
+    args = parser.parse_args()
+    
+    run_server(args.port, args.mode, args.workers, args.queue_depth)
 
 if __name__ == "__main__":
-    run_server()
\ No newline at end of file
+    main()
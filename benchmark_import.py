@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Bulk Import Benchmark for AMTC Lab Management System
+Measures database.import_items() throughput (rows/sec) on a scratch database
+
+Usage:
+    python benchmark_import.py                 # 10k, 100k and 1M rows
+    python benchmark_import.py 10000 50000     # custom row counts
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+def make_items(count, offset=0):
+    """Generate synthetic inventory rows"""
+    base = datetime(2025, 1, 1)
+    items = []
+    for n in range(offset, offset + count):
+        added = base + timedelta(minutes=n)
+        items.append({
+            'id': f'bench-{n}',
+            'ownerName': f'Owner {n % 500}',
+            'emailId': f'owner{n % 500}@example.com',
+            'ssoId': f'{200000000 + n % 500}',
+            'objectStored': f'Sample box {n}',
+            'uniqueId': f'TAG-{n:08d}',
+            'location': f'Shelf {n % 40}',
+            'timePeriod': 7,
+            'dateAdded': added.isoformat(),
+            'expiryDate': (added + timedelta(days=7)).isoformat()
+        })
+    return items
+
+def run_benchmark(database, count, mode):
+    """Import `count` fresh rows into an empty inventory table and time it"""
+    with database.transaction() as conn:
+        conn.execute('DELETE FROM inventory')
+
+    items = make_items(count)
+    start = time.perf_counter()
+    result = database.import_items(items, mode=mode)
+    elapsed = time.perf_counter() - start
+
+    if not result['success'] or result['count'] != count:
+        print(f"   ❌ {mode}: imported {result.get('count')} of {count} - {result['message']}")
+        return
+
+    print(f"   {mode:<7} {count:>10,} rows  {elapsed:8.2f} s  {count / elapsed:>12,.0f} rows/sec")
+
+def main():
+    """Run the benchmark for each requested size"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    # Work in a scratch directory so the real inventory.db is never touched
+    workdir = tempfile.mkdtemp(prefix='amtc-bench-')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import database
+
+    try:
+        print("🔬 AMTC Lab Management System - Bulk Import Benchmark")
+        print("=" * 60)
+        print(f"📁 Scratch database: {os.path.join(workdir, database.DB_FILE)}")
+        print(f"📦 Chunk size: {database.IMPORT_CHUNK_SIZE}")
+        print()
+
+        for count in sizes:
+            for mode in ('skip', 'upsert'):
+                run_benchmark(database, count, mode)
+    finally:
+        database.close_all_connections()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    print()
+    print("✅ Benchmark complete")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Row Representation Benchmark for AMTC Lab Management System
+Compares memory and JSON encoding cost of the tuple-backed InventoryItem
+records against the old one-dict-per-row representation
+
+Usage:
+    python benchmark_rows.py              # 1M rows
+    python benchmark_rows.py 100000       # custom row count
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import tracemalloc
+
+from benchmark_import import make_items
+
+DEFAULT_ROWS = 1_000_000
+
+def measure(label, build):
+    """Run build() and report peak traced memory and wall time"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"   {label:<32} {current / 2**20:9.1f} MB held  {peak / 2**20:9.1f} MB peak  {elapsed:7.2f} s")
+    return result
+
+def main():
+    """Load a scratch database and compare both representations"""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix='amtc-bench-')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    sys.path.insert(0, script_dir)
+    import database
+
+    try:
+        print("🔬 AMTC Lab Management System - Row Representation Benchmark")
+        print("=" * 78)
+        print(f"📦 Loading {rows:,} rows into {os.path.join(workdir, database.DB_FILE)} ...")
+        print("⏱️  Times include tracemalloc overhead - compare them relative to each other")
+        database.import_items(make_items(rows))
+        print()
+
+        def fetch_dicts():
+            cursor = database.get_connection().execute(
+                f'SELECT {", ".join(database.ITEM_COLUMNS)} FROM inventory')
+            return [dict(zip(database.ITEM_COLUMNS, row)) for row in cursor]
+
+        print("🧮 Fetch all rows")
+        dict_rows = measure("dict per row", fetch_dicts)
+        del dict_rows
+        # _select() directly: get_all_items() would also count the read cache's JSON bytes
+        records = measure("InventoryItem records", lambda: database._select(False).fetchall())
+        print()
+
+        print("📝 Encode {'success': True, 'items': [...]} to JSON")
+        dict_rows = [item.to_dict() for item in records]
+        measure("json.dumps(dict rows)", lambda: json.dumps({'success': True, 'items': dict_rows}))
+        del dict_rows
+        measure("database.dumps(records)", lambda: database.dumps({'success': True, 'items': records}))
+    finally:
+        database.close_all_connections()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    print()
+    print("✅ Benchmark complete")
+
+if __name__ == "__main__":
+    main()
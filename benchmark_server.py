@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+HTTP Load Test for AMTC Lab Management System
+Runs basic-server.py against a scratch database in a child process and
+reports throughput and latency at 1, 8 and 64 concurrent clients
+
+Usage:
+    python benchmark_server.py                    # pool mode, 5 s per level
+    python benchmark_server.py --mode threads     # compare another mode
+    python benchmark_server.py --seconds 10 --items 20000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import http.client
+import importlib.util
+import multiprocessing
+
+from benchmark_import import make_items
+
+CLIENT_COUNTS = [1, 8, 64]
+DEFAULT_ITEMS = 2000
+DEFAULT_SECONDS = 5
+
+# Requests each client cycles through: dashboard stats, a page of items,
+# a filtered query and the full (cached) inventory list
+REQUEST_MIX = [
+    '/api/stats',
+    '/api/items?limit=100',
+    '/api/items?location=Shelf%207',
+    '/api/items',
+]
+
+def serve(workdir, items, mode, workers, queue_depth, ready):
+    """Child process: load the scratch database and run the server"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(workdir)
+    sys.path.insert(0, script_dir)
+    import database
+    database.import_items(make_items(items))
+
+    spec = importlib.util.spec_from_file_location('basic_server', os.path.join(script_dir, 'basic-server.py'))
+    basic_server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(basic_server)
+    basic_server.BasicLabServer.log_message = lambda *args: None
+
+    httpd = basic_server.make_server(0, mode, workers, queue_depth)
+    ready.put(httpd.server_address[1])
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+
+def client(port, deadline, latencies, errors, keepalive):
+    """Send requests from REQUEST_MIX until the deadline, timing each one
+
+    With keepalive the connection is reused like a browser would, until
+    the server closes it.
+    """
+    n = 0
+    conn = None
+    while time.perf_counter() < deadline:
+        path = REQUEST_MIX[n % len(REQUEST_MIX)]
+        n += 1
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.will_close or not keepalive:
+                conn.close()
+                conn = None
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            if conn is not None:
+                conn.close()
+                conn = None
+            continue
+        latencies.append(time.perf_counter() - start)
+    if conn is not None:
+        conn.close()
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_level(port, clients, seconds, keepalive):
+    """Run `clients` concurrent clients for `seconds` and print one result line"""
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client, args=(port, deadline, latencies, errors, keepalive))
+               for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        print(f"   {clients:>3} clients  no successful requests ({len(errors)} errors)")
+        return
+    print(f"   {clients:>3} clients  {len(latencies) / elapsed:>8,.0f} req/sec  "
+          f"p50 {percentile(latencies, 0.50) * 1000:7.1f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms  "
+          f"{len(errors):>5} errors")
+
+def main():
+    """Start the server and step through CLIENT_COUNTS"""
+    parser = argparse.ArgumentParser(description='Load test basic-server.py')
+    parser.add_argument('--mode', default='pool', help='Server mode (pool, threads, single)')
+    parser.add_argument('--workers', type=int, default=16, help='Worker threads in pool mode')
+    parser.add_argument('--queue-depth', type=int, default=64, help='Pool queue depth')
+    parser.add_argument('--items', type=int, default=DEFAULT_ITEMS, help='Rows in the scratch inventory')
+    parser.add_argument('--seconds', type=float, default=DEFAULT_SECONDS, help='Duration of each level')
+    parser.add_argument('--new-connections', action='store_true',
+                       help='Open a new connection for every request instead of keeping it alive')
+    args = parser.parse_args()
+
+    # Work in a scratch directory so the real inventory.db is never touched
+    with tempfile.TemporaryDirectory(prefix='amtc-bench-') as workdir:
+        ready = multiprocessing.Queue()
+        server = multiprocessing.Process(
+            target=serve, args=(workdir, args.items, args.mode, args.workers, args.queue_depth, ready), daemon=True)
+        server.start()
+        try:
+            port = ready.get(timeout=120)
+
+            print("🔬 AMTC Lab Management System - HTTP Load Test")
+            print("=" * 72)
+            print(f"📁 Scratch database: {os.path.join(workdir, 'inventory.db')} ({args.items:,} items)")
+            print(f"🧵 Server mode: {args.mode}" + (f" ({args.workers} workers, queue depth {args.queue_depth})"
+                                                   if args.mode == 'pool' else ''))
+            print(f"📦 Request mix: {', '.join(REQUEST_MIX)}")
+            print(f"🔌 Connections: {'new per request' if args.new_connections else 'kept alive'}")
+            print()
+
+            for clients in CLIENT_COUNTS:
+                run_level(port, clients, args.seconds, not args.new_connections)
+        finally:
+            server.terminate()
+            server.join()
+    print()
+    print("✅ Load test complete")
+
+if __name__ == "__main__":
+    main()
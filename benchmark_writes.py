@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Concurrent Write Benchmark for AMTC Lab Management System
+Measures add_item() throughput with 1, 8 and 64 writer threads, through the
+group-commit write queue and with one transaction per call on each thread
+
+Usage:
+    python benchmark_writes.py              # 4000 writes per run
+    python benchmark_writes.py 20000        # custom write count
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import shutil
+import tempfile
+import threading
+
+from benchmark_import import make_items
+
+DEFAULT_WRITES = 4000
+THREAD_COUNTS = [1, 8, 64]
+
+def queued_writer(database, items, failures):
+    for item in items:
+        if not database.add_item(item)['success']:
+            failures.append(item['id'])
+
+def direct_writer(database, items, failures):
+    """The pre-queue behaviour: every call commits on its own connection"""
+    for item in items:
+        try:
+            with database.transaction() as conn:
+                database._add_item(conn, item)
+        except sqlite3.Error:
+            failures.append(item['id'])
+
+def run_benchmark(database, writer, label, writes, threads):
+    """Split `writes` fresh rows across `threads` threads and time them"""
+    with database.transaction() as conn:
+        conn.execute('DELETE FROM inventory')
+    
+    items = make_items(writes)
+    per_thread = writes // threads
+    failures = []
+    workers = [
+        threading.Thread(target=writer, args=(database, items[n * per_thread:(n + 1) * per_thread], failures))
+        for n in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    
+    done = per_thread * threads - len(failures)
+    print(f"   {label:<7} {threads:>3} threads  {elapsed:7.2f} s  {done / elapsed:>9,.0f} writes/sec  {len(failures):>5} failed")
+
+def main():
+    """Run both write paths at each thread count"""
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_WRITES
+    
+    # Work in a scratch directory so the real inventory.db is never touched
+    workdir = tempfile.mkdtemp(prefix='amtc-bench-')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import database
+    
+    try:
+        print("🔬 AMTC Lab Management System - Concurrent Write Benchmark")
+        print("=" * 66)
+        print(f"📁 Scratch database: {os.path.join(workdir, database.DB_FILE)}")
+        print(f"📦 {writes:,} writes per run")
+        print()
+        
+        for threads in THREAD_COUNTS:
+            run_benchmark(database, queued_writer, 'queued', writes, threads)
+            run_benchmark(database, direct_writer, 'direct', writes, threads)
+    finally:
+        database.close_all_connections()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    print()
+    print("✅ Benchmark complete")
+
+if __name__ == "__main__":
+    main()
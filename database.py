@@ -5,19 +5,407 @@ Handles all database operations for permanent data storage
 
 import sqlite3
 import json
-from datetime import datetime
+import base64
+import calendar
+import functools
 import os
+import queue
+import re
+import threading
+import time
+import weakref
+from collections import namedtuple
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
 
 # Database file path
 DB_FILE = 'inventory.db'
 
-def init_database():
-    """Initialize the database with required tables"""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+# Connection tuning
+BUSY_TIMEOUT = 10.0            # seconds to wait on a locked database
+CACHE_SIZE_KIB = 20000         # page cache per connection (~20 MB)
+MMAP_SIZE = 256 * 1024 * 1024  # memory-mapped I/O window
+STATEMENT_CACHE_SIZE = 512     # compiled statements kept per connection
+
+# ==================== CONNECTION MANAGER ====================
+
+# Only the owning thread's _local holds a connection strongly: one left open
+# by a thread that has exited is closed when it is garbage collected, and
+# _connections (weak) just lets close_all_connections() find the live ones.
+# Servers that end a thread per connection call close_connection() first.
+_local = threading.local()
+_connections = weakref.WeakSet()
+_connections_lock = threading.Lock()
+
+class _Connection(sqlite3.Connection):
+    """sqlite3.Connection that can be weakly referenced"""
+
+def _connect():
+    """Open a new tuned connection to DB_FILE"""
+    conn = sqlite3.connect(DB_FILE, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE, factory=_Connection)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KIB}')
+    conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute(f'PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}')
+    conn.execute('PRAGMA foreign_keys = ON')
+    with _connections_lock:
+        _connections.add(conn)
+    return conn
+
+def get_connection():
+    """Return the calling thread's persistent connection, opening it on first use"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'db_file', None) != DB_FILE:
+        if conn is not None:
+            _discard(conn)
+        conn = _connect()
+        _local.conn = conn
+        _local.db_file = DB_FILE
+    return conn
+
+@contextmanager
+def transaction(notify=True):
+    """Run a block in one transaction on the thread's connection (commit or rollback)
+
+    Read-cache entries for tables written in the block are dropped once it
+    ends, and the write listeners are told. With notify=False the caller
+    tells them later, with _notify_writes(_local.unnotified).
+    """
+    conn = get_connection()
+    try:
+        with conn:
+            yield conn
+    finally:
+        written = getattr(_local, 'written', None)
+        if written:
+            _local.written = set()
+            try:
+                seq = _logged_seq(conn)
+            except sqlite3.Error:
+                seq = None
+            _invalidate(written, seq)
+            if notify:
+                _notify_writes(written)
+            else:
+                _local.unnotified = written
+
+def _discard(conn):
+    """Close a connection and forget about it"""
+    with _connections_lock:
+        _connections.discard(conn)
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+def close_connection():
+    """Close the calling thread's connection"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        _discard(conn)
+        _local.conn = None
+
+def close_all_connections():
+    """Close every connection opened by this module (call on shutdown)
+
+    Queued writes are committed first.
+    """
+    stop_writer()
+    with _connections_lock:
+        conns = list(_connections)
+        _connections.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _local.conn = None
+
+# ==================== WRITE QUEUE ====================
+# All mutations go through one writer thread, which commits them in groups:
+# whatever queued up while the previous group was committing (at most
+# WRITE_GROUP_SIZE writes) shares one transaction. Each write runs in its
+# own SAVEPOINT, so a failing write is rolled back alone. With a single
+# writer, request threads never compete for the database write lock.
+
+WRITE_GROUP_SIZE = 256
+# Extra seconds to wait for more writes before committing. 0 suits WAL with
+# synchronous=NORMAL; raise it (e.g. 0.002) if commits are slow to sync.
+WRITE_GROUP_WINDOW = 0.0
+
+_write_queue = queue.SimpleQueue()
+_writer = None
+_writer_lock = threading.Lock()
+_STOP_WRITER = object()
+
+def submit_write(work, *args, on_error=None):
+    """Queue work(conn, *args) for the writer thread and return a Future
+
+    The Future resolves to work's return value once its group has
+    committed. If work raises, its changes are rolled back and the Future
+    gets on_error(exception) as its result, or the exception itself when
+    on_error is None.
+    """
+    global _writer
+    future = Future()
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name='database-writer', daemon=True)
+            _writer.start()
+        _write_queue.put((work, args, on_error, future))
+    return future
+
+def stop_writer(timeout=None):
+    """Commit queued writes and stop the writer thread (restarts on next write)"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+        if writer is None or not writer.is_alive():
+            return
+        _write_queue.put(_STOP_WRITER)
+    writer.join(timeout)
+
+def _writer_loop():
+    """Writer thread: collect a group of queued writes, commit it, repeat"""
+    try:
+        while True:
+            job = _write_queue.get()
+            if job is _STOP_WRITER:
+                return
+            group = [job]
+            deadline = time.monotonic() + WRITE_GROUP_WINDOW
+            while len(group) < WRITE_GROUP_SIZE:
+                try:
+                    job = _write_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if job is _STOP_WRITER:
+                    _commit_group(group)
+                    return
+                group.append(job)
+            _commit_group(group)
+    finally:
+        close_connection()
+
+def _commit_group(group):
+    """Run a group of writes in one transaction, then resolve their futures"""
+    outcomes = []
+    _local.unnotified = None
+    try:
+        # Listeners hear of the commit after the writers have their results
+        with transaction(notify=False) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            for work, args, _, _ in group:
+                conn.execute('SAVEPOINT write')
+                try:
+                    outcomes.append((True, work(conn, *args)))
+                except Exception as e:
+                    conn.execute('ROLLBACK TO write')
+                    outcomes.append((False, e))
+                conn.execute('RELEASE write')
+    except Exception as e:
+        # BEGIN or COMMIT failed: nothing in the group was written
+        outcomes = [(False, e)] * len(group)
+    
+    for (_, _, on_error, future), (ok, value) in zip(group, outcomes):
+        if ok:
+            future.set_result(value)
+        elif on_error is not None:
+            future.set_result(on_error(value))
+        else:
+            future.set_exception(value)
+
+    if _local.unnotified:
+        _notify_writes(_local.unnotified)
+
+def _write(work, args, on_error, wait):
+    """Queue a write; return its result, or the Future itself when wait is False"""
+    future = submit_write(work, *args, on_error=on_error)
+    return future.result() if wait else future
+
+def _error_result(action, **extra):
+    """on_error callback producing the usual {'success': False} response"""
+    return lambda e: {'success': False, 'message': f'Error {action}: {str(e)}', **extra}
+
+# ==================== ROW TYPES ====================
+
+ITEM_COLUMNS = ('id', 'ownerName', 'emailId', 'ssoId', 'objectStored', 'uniqueId',
+                'location', 'timePeriod', 'dateAdded', 'expiryDate')
+ARCHIVED_COLUMNS = ITEM_COLUMNS + ('pickupDate',)
+
+_encode_json_str = json.encoder.encode_basestring_ascii
+
+def _json_value(value):
+    """Encode one column value exactly as json.dumps would"""
+    if value.__class__ is str:
+        return _encode_json_str(value)
+    if value.__class__ is int:
+        return int.__repr__(value)
+    if value is None:
+        return 'null'
+    return json.dumps(value)
+
+class _Record:
+    """Shared behaviour for the tuple-backed row types
+
+    Records are plain tuples (no per-row dict), but also answer item['key']
+    and item.get('key') for their column names so code written against the
+    old dict rows keeps working.
+    """
+    __slots__ = ()
     
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+    
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+    
+    def keys(self):
+        return self._fields
+    
+    def to_dict(self):
+        return dict(zip(self._fields, self))
+    
+    def to_json(self):
+        """Serialize straight to a JSON object string, skipping the dict"""
+        return self._json_template % tuple(map(_json_value, self))
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a dict with (at least) every column key"""
+        return tuple.__new__(cls, [data[field] for field in cls._fields])
+    
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """sqlite3 row_factory producing this record type"""
+        return tuple.__new__(cls, row)
+
+def _json_template(fields):
+    """Build the %-format string used by _Record.to_json"""
+    return '{' + ', '.join(f'"{field}": %s' for field in fields) + '}'
+
+class InventoryItem(_Record, namedtuple('InventoryItem', ITEM_COLUMNS)):
+    """One row of the inventory table"""
+    __slots__ = ()
+    _json_template = _json_template(ITEM_COLUMNS)
+
+class ArchivedItem(_Record, namedtuple('ArchivedItem', ARCHIVED_COLUMNS)):
+    """One row of the archived table"""
+    __slots__ = ()
+    _json_template = _json_template(ARCHIVED_COLUMNS)
+
+def _record_type(archived):
+    """Record class for the archived (True) or inventory (False) table"""
+    return ArchivedItem if archived else InventoryItem
+
+def _select(archived, where='', params=(), schema='main'):
+    """Run a SELECT over inventory/archived returning a cursor of records"""
+    record = _record_type(archived)
+    table = 'archived' if archived else 'inventory'
+    cursor = get_connection().cursor()
+    cursor.row_factory = record.row_factory
+    return cursor.execute(f'SELECT {", ".join(record._fields)} FROM {schema}.{table} {where}', params)
+
+def items_to_json(items):
+    """Serialize a list of records as a JSON array"""
+    return '[' + ', '.join([item.to_json() for item in items]) + ']'
+
+def dumps(data):
+    """json.dumps for API results whose 'items' list may hold records"""
+    items = data.get('items') if isinstance(data, dict) else None
+    if not items or not isinstance(items[0], _Record):
+        return json.dumps(data, default=lambda value: value.to_dict())
+    
+    rest = {key: value for key, value in data.items() if key != 'items'}
+    head = json.dumps(rest)
+    separator = ', ' if rest else ''
+    return head[:-1] + separator + '"items": ' + items_to_json(items) + '}'
+
+# ==================== STREAMING ENCODER ====================
+# Large results are encoded and sent a batch of records at a time, so a
+# response never needs the whole list as one string and its first bytes
+# leave before the last row is read.
+
+STREAM_BATCH_SIZE = 500  # records per encoded chunk
+
+def _json_document(rest, batches):
+    """Encoded chunks of dumps(dict(rest, items=...)) for batches of records"""
+    head = json.dumps(rest)
+    prefix = head[:-1] + (', ' if rest else '') + '"items": ['
+    for batch in batches:
+        yield (prefix + ', '.join([item.to_json() for item in batch])).encode('utf-8')
+        prefix = ', '
+    yield (']}' if prefix == ', ' else prefix + ']}').encode('utf-8')
+
+def _ndjson_lines(batches):
+    """Encoded chunks of newline-delimited JSON, one record per line"""
+    for batch in batches:
+        yield ''.join([item.to_json() + '\n' for item in batch]).encode('utf-8')
+
+def _record_batches(cursors, batch_size):
+    """Lists of up to batch_size records from each cursor in turn"""
+    try:
+        for cursor in cursors:
+            try:
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    yield batch
+            finally:
+                cursor.close()
+    finally:
+        if hasattr(cursors, 'close'):
+            cursors.close()
+
+def iter_json(data, batch_size=STREAM_BATCH_SIZE):
+    """dumps(data) as encoded chunks, batch_size records of 'items' at a time"""
+    items = data.get('items') if isinstance(data, dict) else None
+    if not items or not isinstance(items[0], _Record):
+        yield dumps(data).encode('utf-8')
+        return
+    rest = {key: value for key, value in data.items() if key != 'items'}
+    yield from _json_document(rest, (items[start:start + batch_size] for start in range(0, len(items), batch_size)))
+
+def stream_items(archived=False, filters=None, order_by=None, limit=None, since=None, until=None,
+                 ndjson=False, batch_size=STREAM_BATCH_SIZE):
+    """Items as encoded JSON chunks, read from SQLite while they are consumed
+
+    The streaming form of query_items() and get_all_archived(): the same
+    {"success": true, "items": [...]} document, or with ndjson one record
+    per line, holding only batch_size records at a time. since/until read
+    an archived range across the cold tiers. Bad filters raise here or on
+    the first next(), before anything has been produced. The read cache is
+    bypassed, and the cursor's read transaction stays open until the
+    generator finishes.
+    """
+    if since is not None or until is not None:
+        cursors = _archived_range_cursors(since, until)
+    else:
+        where, params = _query_sql(filters, order_by, limit, archived)
+        cursors = iter([_select(archived, where, params)])
+    batches = _record_batches(cursors, batch_size)
+    return _ndjson_lines(batches) if ndjson else _json_document({'success': True}, batches)
+
+# ==================== SCHEMA ====================
+
+def init_database():
+    """Initialize the database with required tables (applies any pending migrations)"""
+    migrate_database()
+    print("✅ Database initialized successfully")
+
+def _create_tables(conn):
+    """Create the inventory and archived tables"""
     # Create inventory table
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS inventory (
             id TEXT PRIMARY KEY,
             ownerName TEXT NOT NULL,
@@ -33,8 +421,11 @@ def init_database():
     ''')
     
     # Create archived items table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS archived (
+    conn.execute(_ARCHIVED_TABLE_SQL.format(name='archived'))
+
+# Also used for the cold archive tier files
+_ARCHIVED_TABLE_SQL = '''
+        CREATE TABLE IF NOT EXISTS {name} (
             id TEXT PRIMARY KEY,
             ownerName TEXT NOT NULL,
             emailId TEXT NOT NULL,
@@ -47,211 +438,1395 @@ def init_database():
             expiryDate TEXT NOT NULL,
             pickupDate TEXT NOT NULL
         )
-    ''')
+'''
+
+# ==================== EPOCH DATE COLUMNS ====================
+# ISO TEXT dates stay the API format; integer epoch (seconds, UTC) copies are
+# kept alongside them so date range queries are plain index scans.
+
+EPOCH_COLUMNS = {
+    'inventory': [('dateAddedEpoch', 'dateAdded'), ('expiryEpoch', 'expiryDate')],
+    'archived': [('dateAddedEpoch', 'dateAdded'), ('expiryEpoch', 'expiryDate'), ('pickupEpoch', 'pickupDate')],
+}
+
+def _epoch_sql(expression):
+    """SQL converting an ISO date expression to integer epoch seconds"""
+    return f"CAST(strftime('%s', {expression}) AS INTEGER)"
+
+def _insert_sql(table, columns, rows=1):
+    """INSERT statement that also fills the epoch columns from the bound dates
+
+    With rows > 1 it takes that many rows of parameters, flattened.
+    """
+    epochs = EPOCH_COLUMNS[table]
+    names = list(columns) + [epoch for epoch, _ in epochs]
+    tuples = []
+    for offset in range(0, rows * len(columns), len(columns)):
+        values = [f'?{offset + n}' for n in range(1, len(columns) + 1)]
+        values += [_epoch_sql(f'?{offset + columns.index(source) + 1}') for _, source in epochs]
+        tuples.append(f'({", ".join(values)})')
+    return f'''
+    INSERT INTO {table} 
+    ({", ".join(names)})
+    VALUES {", ".join(tuples)}
+'''
+
+_INSERT_ITEM_SQL = _insert_sql('inventory', ITEM_COLUMNS)
+
+def _archive_sql():
+    """INSERT ... SELECT copying one stored inventory row (?2) to archived with pickupDate ?1"""
+    names = list(ARCHIVED_COLUMNS) + [epoch for epoch, _ in EPOCH_COLUMNS['archived']]
+    values = list(ITEM_COLUMNS) + ['?1']
+    values += [_epoch_sql('?1' if source == 'pickupDate' else source) for _, source in EPOCH_COLUMNS['archived']]
+    return f'''
+    INSERT INTO archived
+    ({", ".join(names)})
+    SELECT {", ".join(values)} FROM inventory WHERE id = ?2
+'''
+
+_ARCHIVE_ITEM_SQL = _archive_sql()
+
+def _add_epoch_columns(conn):
+    """Add any missing epoch columns
+
+    Writes in this module fill the epochs themselves (_insert_sql,
+    _update_sql); triggers were measured to slow bulk upserts ~15x.
+    Rows written by other tools keep NULL epochs, and so miss date
+    filters, until backfill_epochs() is run again (migration 4 runs it once).
+    """
+    for table, epochs in EPOCH_COLUMNS.items():
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+        for epoch, source in epochs:
+            if epoch not in existing:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {epoch} INTEGER')
+
+def backfill_epochs(batch_size=5000):
+    """Fill NULL epoch columns from the TEXT dates, one short transaction per batch
+
+    Walks each table in rowid order so other readers and writers can get in
+    between batches; rows whose dates cannot be parsed are left NULL.
+    Returns the number of rows updated.
+    """
+    conn = get_connection()
+    updated = 0
+    for table, epochs in EPOCH_COLUMNS.items():
+        sets = ', '.join(f'{epoch} = {_epoch_sql(source)}' for epoch, source in epochs)
+        pending = ' OR '.join(f'{epoch} IS NULL' for epoch, _ in epochs)
+        if conn.execute(f'SELECT 1 FROM {table} WHERE {pending} LIMIT 1').fetchone() is None:
+            continue
+        last_rowid = 0
+        while True:
+            row = conn.execute(
+                f'SELECT max(rowid) FROM (SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?)',
+                (last_rowid, batch_size)
+            ).fetchone()
+            if row[0] is None:
+                break
+            with transaction():
+                cursor = conn.execute(
+                    f'UPDATE {table} SET {sets} WHERE rowid > ? AND rowid <= ? AND ({pending})',
+                    (last_rowid, row[0])
+                )
+                updated += cursor.rowcount
+            last_rowid = row[0]
+    return updated
+
+# ==================== FULL-TEXT SEARCH INDEX ====================
+# External-content FTS5 tables mirror the searchable columns of inventory and
+# archived (hot tier only); triggers keep them in sync on every write.
+
+SEARCH_COLUMNS = ('ownerName', 'objectStored', 'location', 'uniqueId', 'ssoId')
+
+def _create_search_index(conn):
+    """Create the FTS5 tables and sync triggers, then index existing rows"""
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'NEW.{column}' for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f'OLD.{column}' for column in SEARCH_COLUMNS)
     
-    conn.commit()
-    conn.close()
-    print("✅ Database initialized successfully")
+    for table in ('inventory', 'archived'):
+        fts = f'{table}_fts'
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {columns}, content='{table}', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {columns}) VALUES (NEW.rowid, {new_values});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', OLD.rowid, {old_values});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {columns} ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', OLD.rowid, {old_values});
+                INSERT INTO {fts} (rowid, {columns}) VALUES (NEW.rowid, {new_values});
+            END
+        ''')
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
 
-def add_item(item):
-    """Add a new item to the inventory"""
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO inventory 
-            (id, ownerName, emailId, ssoId, objectStored, uniqueId, location, timePeriod, dateAdded, expiryDate)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            item['id'],
-            item['ownerName'],
-            item['emailId'],
-            item['ssoId'],
-            item['objectStored'],
-            item['uniqueId'],
-            item['location'],
-            item['timePeriod'],
-            item['dateAdded'],
-            item['expiryDate']
-        ))
+# ==================== CHANGE LOG ====================
+# Every insert, update, delete and archive done through this module appends
+# (seq, op, itemId) to the changes table. seq only grows (AUTOINCREMENT), so
+# clients can ask for everything after the last seq they saw. Only the
+# newest CHANGE_LOG_SIZE entries are kept; older clients get a snapshot.
+
+CHANGE_LOG_SIZE = 100_000
+CHANGE_OPS = ('insert', 'update', 'delete', 'archive')
+
+def _create_change_log(conn):
+    """Create the changes table"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL,
+            itemId TEXT NOT NULL,
+            changedAt INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        )
+    ''')
+
+def _log_changes(conn, op, ids):
+    """Record one change per item id and trim the log to CHANGE_LOG_SIZE"""
+    if op == 'archive':
+        _mark_written('inventory', 'archived')
+    else:
+        _mark_written('inventory')
+    conn.executemany('INSERT INTO changes (op, itemId) VALUES (?, ?)', [(op, item_id) for item_id in ids])
+    conn.execute('DELETE FROM changes WHERE seq <= (SELECT max(seq) FROM changes) - ?', (CHANGE_LOG_SIZE,))
+
+# ==================== SCHEMA MIGRATIONS ====================
+# The schema version lives in PRAGMA user_version. Every step is idempotent,
+# so databases created before versioning (user_version 0) replay them safely.
+
+MIGRATION_BATCH_SIZE = 5000
+
+# Secondary indexes: (index name, table, columns)
+INDEXES = [
+    ('idx_inventory_emailId', 'inventory', 'emailId'),
+    ('idx_inventory_ssoId', 'inventory', 'ssoId'),
+    ('idx_inventory_location', 'inventory', 'location'),
+    ('idx_archived_emailId', 'archived', 'emailId'),
+    ('idx_archived_ssoId', 'archived', 'ssoId'),
+    ('idx_archived_location', 'archived', 'location'),
+    ('idx_archived_uniqueId', 'archived', 'uniqueId'),
+    ('idx_inventory_dateAdded_id', 'inventory', 'dateAdded, id'),
+    ('idx_archived_dateAdded_id', 'archived', 'dateAdded, id'),
+]
+
+EPOCH_INDEXES = [
+    ('idx_inventory_expiryEpoch', 'inventory', 'expiryEpoch'),
+    ('idx_archived_expiryEpoch', 'archived', 'expiryEpoch'),
+    ('idx_archived_pickupEpoch', 'archived', 'pickupEpoch'),
+]
+
+# TEXT expiryDate indexes made redundant by the expiryEpoch ones
+DROPPED_INDEXES = ['idx_inventory_expiryDate', 'idx_archived_expiryDate']
+
+def _create_indexes(indexes):
+    """Migration step creating the given indexes"""
+    def apply(conn):
+        for name, table, columns in indexes:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})')
+    return apply
+
+def _drop_indexes(names):
+    """Migration step dropping the given indexes"""
+    def apply(conn):
+        for name in names:
+            conn.execute(f'DROP INDEX IF EXISTS {name}')
+    return apply
+
+# Ordered steps. 'apply' runs in one transaction together with the version
+# bump; 'batched' runs first, committing every batch_size rows, so large
+# tables are never locked for long.
+MIGRATIONS = [
+    {'version': 1, 'description': 'Create inventory and archived tables', 'apply': _create_tables},
+    {'version': 2, 'description': 'Index filter and paging columns', 'apply': _create_indexes(INDEXES)},
+    {'version': 3, 'description': 'Add integer epoch date columns', 'apply': _add_epoch_columns},
+    {'version': 4, 'description': 'Backfill epoch date columns', 'batched': backfill_epochs},
+    {'version': 5, 'description': 'Index epoch date columns', 'apply': _create_indexes(EPOCH_INDEXES)},
+    {'version': 6, 'description': 'Full-text search index', 'apply': _create_search_index},
+    {'version': 7, 'description': 'Create change log', 'apply': _create_change_log},
+    {'version': 8, 'description': 'Drop TEXT expiry date indexes', 'apply': _drop_indexes(DROPPED_INDEXES)},
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1]['version']
+
+def schema_version():
+    """Current schema version of DB_FILE"""
+    return get_connection().execute('PRAGMA user_version').fetchone()[0]
+
+def migrate_database(dry_run=False, batch_size=MIGRATION_BATCH_SIZE):
+    """Apply pending schema migrations in order
+
+    With dry_run=True nothing is changed; the returned plan lists the steps
+    that would run.
+    """
+    current = schema_version()
+    pending = [step for step in MIGRATIONS if step['version'] > current]
+    plan = {
+        'current_version': current,
+        'target_version': SCHEMA_VERSION,
+        'pending': [{'version': step['version'], 'description': step['description']} for step in pending]
+    }
+    if dry_run or not pending:
+        return plan
+    
+    conn = get_connection()
+    for step in pending:
+        if 'batched' in step:
+            step['batched'](batch_size)
         
-        conn.commit()
-        conn.close()
-        return {'success': True, 'message': 'Item added successfully'}
-    except sqlite3.IntegrityError as e:
+        with transaction():
+            conn.execute('BEGIN IMMEDIATE')
+            # Another process may have applied it while we waited for the lock
+            if schema_version() >= step['version']:
+                continue
+            if 'apply' in step:
+                step['apply'](conn)
+            conn.execute(f"PRAGMA user_version = {step['version']}")
+        print(f"🔧 Applied migration {step['version']}: {step['description']}")
+    
+    conn.execute('PRAGMA optimize')
+    return plan
+
+# ==================== READ CACHE ====================
+# get_all_items() and get_all_archived() (hot archive, no date range) are
+# served from memory: the records plus the encoded JSON response. Writes
+# through this module mark the tables they touch, and transaction() drops
+# those entries after the write commits. A generation number per table
+# stops a read that overlapped a write from caching what it saw; with a
+# per-process token it also versions the table for conditional GETs
+# (table_version). Writes made by other processes are not noticed.
+# Write listeners (add_write_listener) are called just after, so live views
+# such as the server's event stream learn of a commit at once.
+
+_cache = {}  # table -> (DB_FILE, records, JSON response bytes)
+_cache_generation = {'inventory': 0, 'archived': 0}
+_cache_modified = dict.fromkeys(_cache_generation, time.time())  # last invalidation
+_cache_token = f'{os.getpid():x}.{time.time_ns():x}'
+_cache_counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_settled = (None, 0)  # (DB_FILE, highest change seq whose writes' entries have been dropped)
+_cache_lock = threading.Lock()
+_write_listeners = []
+
+def _mark_written(*tables):
+    """Note tables changed by the current transaction (see transaction())"""
+    written = getattr(_local, 'written', None)
+    if written is None:
+        written = _local.written = set()
+    written.update(tables)
+
+def _invalidate(tables, seq=None):
+    """Drop cached entries for tables whose writes just committed (logged up to change seq)"""
+    global _settled
+    with _cache_lock:
+        if seq is not None:
+            _settled = (DB_FILE, max(seq, _settled[1]) if _settled[0] == DB_FILE else seq)
+        for table in tables:
+            _cache.pop(table, None)
+            _cache_generation[table] += 1
+            _cache_modified[table] = time.time()
+            _cache_counters['invalidations'] += 1
+
+def _notify_writes(tables):
+    for listener in _write_listeners:
+        listener(tables)
+
+def add_write_listener(callback):
+    """Call callback(tables) after each commit that wrote tables through this module
+
+    For queued writes it is called once their Futures have their results,
+    so a request's response is ready before a live view hears of it. It
+    runs on the thread that committed (usually the writer thread), so it
+    must return quickly and not raise.
+    """
+    _write_listeners.append(callback)
+
+def _cached(table):
+    """(records, JSON bytes) for a whole table, read through the cache"""
+    with _cache_lock:
+        entry = _cache.get(table)
+        if entry is not None and entry[0] == DB_FILE:
+            _cache_counters['hits'] += 1
+            return entry[1:]
+        _cache_counters['misses'] += 1
+        generation = _cache_generation[table]
+    
+    # Tuple, so callers cannot change the cached list
+    db_file = DB_FILE
+    records = tuple(_select(archived=table == 'archived'))
+    entry = (db_file, records, dumps({'success': True, 'items': records}).encode('utf-8'))
+    with _cache_lock:
+        if _cache_generation[table] == generation:
+            _cache[table] = entry
+    return entry[1:]
+
+def cache_info():
+    """Read cache counters and the number of records cached per table"""
+    with _cache_lock:
+        return dict(_cache_counters, entries={table: len(entry[1]) for table, entry in _cache.items()})
+
+def clear_cache():
+    """Empty the read cache (after changing the database outside this module)"""
+    _invalidate(list(_cache_generation))
+    _notify_writes(list(_cache_generation))
+
+def table_version(table):
+    """(version tag, epoch seconds of the last write) for a whole-table read
+
+    The tag changes whenever a write to the table commits, without
+    reading any rows. Take it before reading the data it describes: a
+    write in between then only makes the tag look older than the data.
+    """
+    with _cache_lock:
+        return f'{table}-{_cache_token}-{_cache_generation[table]}', _cache_modified[table]
+
+def _add_item(conn, item):
+    record = InventoryItem.from_dict(item)
+    conn.execute(_INSERT_ITEM_SQL, record)
+    _log_changes(conn, 'insert', [record.id])
+    return {'success': True, 'message': 'Item added successfully'}
+
+def _add_item_error(e):
+    if isinstance(e, sqlite3.IntegrityError):
         return {'success': False, 'message': f'Item with this ID already exists: {str(e)}'}
-    except Exception as e:
-        return {'success': False, 'message': f'Error adding item: {str(e)}'}
+    return {'success': False, 'message': f'Error adding item: {str(e)}'}
+
+def add_item(item, wait=True):
+    """Add a new item to the inventory (wait=False returns a Future of the result)"""
+    return _write(_add_item, (item,), _add_item_error, wait)
 
 def get_all_items():
-    """Get all items from inventory"""
+    """Get all items from inventory (cached; the items tuple is shared)"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM inventory')
-        rows = cursor.fetchall()
-        
-        items = []
-        for row in rows:
-            items.append({
-                'id': row[0],
-                'ownerName': row[1],
-                'emailId': row[2],
-                'ssoId': row[3],
-                'objectStored': row[4],
-                'uniqueId': row[5],
-                'location': row[6],
-                'timePeriod': row[7],
-                'dateAdded': row[8],
-                'expiryDate': row[9]
-            })
-        
-        conn.close()
+        items, _ = _cached('inventory')
         return {'success': True, 'items': items}
     except Exception as e:
         return {'success': False, 'message': f'Error fetching items: {str(e)}', 'items': []}
 
-def get_all_archived():
-    """Get all archived items"""
+def get_all_items_json():
+    """get_all_items() response as encoded JSON bytes, straight from the cache"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM archived')
-        rows = cursor.fetchall()
-        
-        items = []
-        for row in rows:
-            items.append({
-                'id': row[0],
-                'ownerName': row[1],
-                'emailId': row[2],
-                'ssoId': row[3],
-                'objectStored': row[4],
-                'uniqueId': row[5],
-                'location': row[6],
-                'timePeriod': row[7],
-                'dateAdded': row[8],
-                'expiryDate': row[9],
-                'pickupDate': row[10]
-            })
-        
-        conn.close()
+        return _cached('inventory')[1]
+    except Exception as e:
+        return dumps({'success': False, 'message': f'Error fetching items: {str(e)}', 'items': []}).encode('utf-8')
+
+def get_all_archived(since=None, until=None):
+    """Get archived items
+
+    Without a date range only the hot archive in DB_FILE is read (cached).
+    Passing since/until (ISO pickup dates, until exclusive) restricts the
+    result to that range and also reads every cold tier file the range
+    overlaps.
+    """
+    try:
+        if since is None and until is None:
+            items, _ = _cached('archived')
+        else:
+            items = _get_archived_range(since, until)
         return {'success': True, 'items': items}
     except Exception as e:
         return {'success': False, 'message': f'Error fetching archived items: {str(e)}', 'items': []}
 
-def update_item(item_id, updates):
-    """Update an existing item"""
+def get_all_archived_json():
+    """get_all_archived() (hot archive) response as encoded JSON bytes"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        # Build update query dynamically
-        set_clause = ', '.join([f"{key} = ?" for key in updates.keys()])
-        values = list(updates.values()) + [item_id]
-        
-        cursor.execute(f'UPDATE inventory SET {set_clause} WHERE id = ?', values)
-        
-        conn.commit()
-        conn.close()
-        return {'success': True, 'message': 'Item updated successfully'}
+        return _cached('archived')[1]
     except Exception as e:
-        return {'success': False, 'message': f'Error updating item: {str(e)}'}
+        return dumps({'success': False, 'message': f'Error fetching archived items: {str(e)}', 'items': []}).encode('utf-8')
+
+# Columns clients may change through update_item/update_items
+UPDATABLE_COLUMNS = frozenset(ITEM_COLUMNS) - {'id'}
+
+@functools.lru_cache(maxsize=None)
+def _update_sql(keys):
+    """UPDATE statement for a sorted tuple of column names
+
+    Returns (sql, epoch sources): the dates whose values are bound again
+    to refresh their epoch columns. One SQL text per column set means
+    sqlite3's statement cache reuses the compiled statement. At most
+    2**len(UPDATABLE_COLUMNS) entries; rejected keys are never cached.
+    """
+    invalid = [key for key in keys if key not in UPDATABLE_COLUMNS]
+    if invalid:
+        raise ValueError(f'Cannot update column(s): {", ".join(map(str, invalid))}')
+    
+    epochs = [(epoch, source) for epoch, source in EPOCH_COLUMNS['inventory'] if source in keys]
+    clauses = [f'{key} = ?' for key in keys] + [f'{epoch} = {_epoch_sql("?")}' for epoch, _ in epochs]
+    return f'UPDATE inventory SET {", ".join(clauses)} WHERE id = ?', tuple(source for _, source in epochs)
+
+def _update_statement(updates):
+    """UPDATE SQL for a set of changed columns and its values (item id goes last)"""
+    keys = tuple(sorted(updates))
+    sql, epoch_sources = _update_sql(keys)
+    return sql, [updates[key] for key in keys] + [updates[source] for source in epoch_sources]
+
+def _update_item(conn, item_id, updates):
+    if not updates:
+        raise ValueError('no updates given')
+    # Whitelisted statement, shared by every update of the same columns
+    sql, values = _update_statement(updates)
+    if conn.execute(sql, values + [item_id]).rowcount:
+        _log_changes(conn, 'update', [item_id])
+    return {'success': True, 'message': 'Item updated successfully'}
+
+def update_item(item_id, updates, wait=True):
+    """Update an existing item (wait=False returns a Future of the result)"""
+    return _write(_update_item, (item_id, updates), _error_result('updating item'), wait)
+
+def _delete_item(conn, item_id):
+    if conn.execute('DELETE FROM inventory WHERE id = ?', (item_id,)).rowcount:
+        _log_changes(conn, 'delete', [item_id])
+    return {'success': True, 'message': 'Item deleted successfully'}
+
+def delete_item(item_id, wait=True):
+    """Delete an item from inventory (wait=False returns a Future of the result)"""
+    return _write(_delete_item, (item_id,), _error_result('deleting item'), wait)
+
+def _archive_item(conn, item, pickup_date):
+    # Copy the stored row to archived; only the id is taken from the client's item
+    item_id = item['id']
+    if not conn.execute(_ARCHIVE_ITEM_SQL, (pickup_date, item_id)).rowcount:
+        return {'success': False, 'message': 'Item not found'}
+    
+    # Remove from inventory
+    conn.execute('DELETE FROM inventory WHERE id = ?', (item_id,))
+    _log_changes(conn, 'archive', [item_id])
+    return {'success': True, 'message': 'Item archived successfully'}
+
+def archive_item(item, pickup_date, wait=True):
+    """Move an item ({'id', ...}) from inventory to archived (wait=False returns a Future of the result)"""
+    return _write(_archive_item, (item, pickup_date), _error_result('archiving item'), wait)
 
-def delete_item(item_id):
-    """Delete an item from inventory"""
+# ==================== BATCH OPERATIONS ====================
+# Each batch is a single write on the writer thread (one transaction) using
+# executemany. Results are reported per item, in input order:
+# {'id', 'success', 'message'}. wait=False returns a Future of the response.
+
+_IN_CHUNK = 500  # ids per IN (...) lookup, well under SQLite's variable limit
+
+def _existing_ids(conn, table, ids):
+    """Subset of `ids` present in `table`"""
+    found = set()
+    ids = list(ids)
+    for start in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[start:start + _IN_CHUNK]
+        placeholders = ', '.join('?' * len(chunk))
+        found.update(row[0] for row in conn.execute(f'SELECT id FROM {table} WHERE id IN ({placeholders})', chunk))
+    return found
+
+def _batch_result(results, verb):
+    """Wrap per-item results in the usual response shape"""
+    count = sum(1 for result in results if result['success'])
+    return {'success': True, 'message': f'{verb} {count} of {len(results)} items', 'count': count, 'results': results}
+
+def _archive_items(conn, items, pickup_date):
+    results = []
+    archived = []
+    seen = set()
+    ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+    stored = _existing_ids(conn, 'inventory', [item_id for item_id in ids if item_id is not None])
+    already_archived = _existing_ids(conn, 'archived', [item_id for item_id in ids if item_id is not None])
+    
+    for item_id in ids:
+        if item_id is None:
+            results.append({'id': None, 'success': False, 'message': "Missing field: 'id'"})
+        elif item_id in already_archived or item_id in seen:
+            results.append({'id': item_id, 'success': False, 'message': 'Item is already archived'})
+        elif item_id not in stored:
+            results.append({'id': item_id, 'success': False, 'message': 'Item not found'})
+        else:
+            seen.add(item_id)
+            archived.append(item_id)
+            results.append({'id': item_id, 'success': True, 'message': 'Item archived successfully'})
+    
+    # The stored rows are archived, not the client's copies of them
+    conn.executemany(_ARCHIVE_ITEM_SQL, [(pickup_date, item_id) for item_id in archived])
+    conn.executemany('DELETE FROM inventory WHERE id = ?', [(item_id,) for item_id in archived])
+    _log_changes(conn, 'archive', archived)
+    return _batch_result(results, 'Archived')
+
+def archive_items(items, pickup_date, wait=True):
+    """Move several items ([{'id', ...}]) from inventory to archived in one transaction"""
+    return _write(_archive_items, (items, pickup_date), _error_result('archiving items', results=[]), wait)
+
+def _delete_items(conn, ids):
+    existing = _existing_ids(conn, 'inventory', ids)
+    conn.executemany('DELETE FROM inventory WHERE id = ?', [(item_id,) for item_id in existing])
+    _log_changes(conn, 'delete', existing)
+    
+    results = [
+        {'id': item_id, 'success': True, 'message': 'Item deleted successfully'} if item_id in existing
+        else {'id': item_id, 'success': False, 'message': 'Item not found'}
+        for item_id in ids
+    ]
+    return _batch_result(results, 'Deleted')
+
+def delete_items(ids, wait=True):
+    """Delete several items from inventory in one transaction"""
+    return _write(_delete_items, (ids,), _error_result('deleting items', results=[]), wait)
+
+def _update_items(conn, changes):
+    results = []
+    groups = {}
+    existing = _existing_ids(conn, 'inventory', [change.get('id') for change in changes])
+    
+    for change in changes:
+        item_id, updates = change.get('id'), change.get('updates')
+        if not updates:
+            results.append({'id': item_id, 'success': False, 'message': 'No updates given'})
+            continue
+        if item_id not in existing:
+            results.append({'id': item_id, 'success': False, 'message': 'Item not found'})
+            continue
+        try:
+            sql, values = _update_statement(updates)
+        except ValueError as e:
+            results.append({'id': item_id, 'success': False, 'message': str(e)})
+            continue
+        groups.setdefault(sql, []).append(values + [item_id])
+        results.append({'id': item_id, 'success': True, 'message': 'Item updated successfully'})
+    
+    for sql, rows in groups.items():
+        conn.executemany(sql, rows)
+    _log_changes(conn, 'update', [row[-1] for rows in groups.values() for row in rows])
+    return _batch_result(results, 'Updated')
+
+def update_items(changes, wait=True):
+    """Apply several [{'id', 'updates'}] changes in one transaction
+
+    Changes touching the same set of columns share one statement and go
+    through a single executemany.
+    """
+    return _write(_update_items, (changes,), _error_result('updating items', results=[]), wait)
+
+# ==================== MIXED BATCHES ====================
+# run_batch() runs an ordered list of different operations (an update
+# followed by an archive, say) as one write: one transaction, one commit.
+# Operations are {'op': name, ...fields}; each gets a result in the usual
+# {'success', 'message'} shape plus its 'op'.
+
+MAX_BATCH_OPERATIONS = 1000
+
+# op -> (work function, request fields passed to it, on_error)
+BATCH_OPERATIONS = {
+    'add': (_add_item, ('item',), _add_item_error),
+    'update': (_update_item, ('id', 'updates'), _error_result('updating item')),
+    'delete': (_delete_item, ('id',), _error_result('deleting item')),
+    'archive': (_archive_item, ('item', 'pickupDate'), _error_result('archiving item')),
+}
+
+class BatchRolledBack(Exception):
+    """An atomic batch had a failing operation; carries the per-operation results"""
+    def __init__(self, index, results):
+        super().__init__(f'operation {index} failed')
+        self.index = index
+        self.results = results
+
+def _run_operation(conn, operation):
+    """Run one batch operation in its own savepoint; returns its result"""
+    name = operation.get('op') if isinstance(operation, dict) else None
+    if name not in BATCH_OPERATIONS:
+        return {'op': name, 'success': False, 'message': f'Unknown operation: {name}'}
+    work, fields, on_error = BATCH_OPERATIONS[name]
+    conn.execute('SAVEPOINT batch_operation')
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM inventory WHERE id = ?', (item_id,))
-        
-        conn.commit()
-        conn.close()
-        return {'success': True, 'message': 'Item deleted successfully'}
+        result = work(conn, *[operation.get(field) for field in fields])
     except Exception as e:
-        return {'success': False, 'message': f'Error deleting item: {str(e)}'}
+        conn.execute('ROLLBACK TO batch_operation')
+        result = on_error(e)
+    conn.execute('RELEASE batch_operation')
+    return dict(result, op=name)
+
+def _run_batch(conn, operations, atomic):
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ValueError(f'at most {MAX_BATCH_OPERATIONS} operations per batch')
+    results = []
+    for index, operation in enumerate(operations):
+        result = _run_operation(conn, operation)
+        results.append(result)
+        if atomic and not result['success']:
+            # Undo the whole batch (the writer rolls back this write)
+            for earlier in results[:index]:
+                earlier.update(success=False, message=f'Rolled back: operation {index} failed')
+            results += [{'op': later.get('op') if isinstance(later, dict) else None, 'success': False,
+                         'message': f'Not run: operation {index} failed'} for later in operations[index + 1:]]
+            raise BatchRolledBack(index, results)
+    count = sum(1 for result in results if result['success'])
+    return {'success': count == len(results), 'committed': True,
+            'message': f'{count} of {len(results)} operations succeeded', 'results': results}
+
+def _batch_error(e):
+    if isinstance(e, BatchRolledBack):
+        return {'success': False, 'committed': False, 'message': f'Batch rolled back: {e}', 'results': e.results}
+    return {'success': False, 'committed': False, 'message': f'Error running batch: {str(e)}', 'results': []}
+
+def run_batch(operations, atomic=True, wait=True):
+    """Run add/update/delete/archive operations, in order, as one transaction
+
+    Returns {'success', 'committed', 'message', 'results'} with one result
+    per operation. atomic (the default) commits all of them or, if any
+    fails, none: the failing one keeps its error and the others report
+    being rolled back or not run. With atomic=False every operation that
+    succeeds is committed. wait=False returns a Future of the response.
+    """
+    return _write(_run_batch, (operations, atomic), _batch_error, wait)
+
+# ==================== ARCHIVE TIERING ====================
+# Archived rows picked up more than ARCHIVE_HOT_DAYS ago are moved out of
+# DB_FILE into one SQLite file per pickup year under ARCHIVE_TIER_DIR. Those
+# files are ATTACHed only while a query whose date range reaches them runs.
+
+ARCHIVE_HOT_DAYS = 365
+ARCHIVE_TIER_DIR = 'archive'
+_TIER_FILE = re.compile(r'archived-(\d{4})\.db')
+
+def _tier_dir():
+    """Directory holding the cold archive files, next to DB_FILE"""
+    return os.path.join(os.path.dirname(os.path.abspath(DB_FILE)), ARCHIVE_TIER_DIR)
+
+def _tier_path(year):
+    return os.path.join(_tier_dir(), f'archived-{year}.db')
+
+def _year_bounds(year):
+    """[start, end) epoch seconds of a calendar year (UTC)"""
+    return calendar.timegm((year, 1, 1, 0, 0, 0)), calendar.timegm((year + 1, 1, 1, 0, 0, 0))
+
+def archive_tier_years():
+    """Pickup years that have a cold archive file, oldest first"""
+    directory = _tier_dir()
+    if not os.path.isdir(directory):
+        return []
+    matches = (_TIER_FILE.fullmatch(name) for name in os.listdir(directory))
+    return sorted(int(match.group(1)) for match in matches if match)
+
+@contextmanager
+def _attached_tier(year):
+    """ATTACH one year's archive file for the duration of the block"""
+    conn = get_connection()
+    schema = f'tier_{year}'
+    conn.execute(f'ATTACH DATABASE ? AS {schema}', (_tier_path(year),))
+    try:
+        yield schema
+    finally:
+        conn.execute(f'DETACH DATABASE {schema}')
+
+def _ensure_tier_schema(conn, schema):
+    """Create the archived table and its indexes inside an attached tier file"""
+    conn.execute(_ARCHIVED_TABLE_SQL.format(name=f'{schema}.archived'))
+    existing = {row[1] for row in conn.execute(f'PRAGMA {schema}.table_info(archived)')}
+    for epoch, _ in EPOCH_COLUMNS['archived']:
+        if epoch not in existing:
+            conn.execute(f'ALTER TABLE {schema}.archived ADD COLUMN {epoch} INTEGER')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_archived_pickupEpoch ON archived (pickupEpoch)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_archived_dateAdded_id ON archived (dateAdded, id)')
+
+def _delete_archived(conn, ids):
+    """Writer job: delete hot archive rows (moved to a tier file) by id"""
+    deleted = 0
+    for start in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[start:start + _IN_CHUNK]
+        placeholders = ', '.join('?' * len(chunk))
+        deleted += conn.execute(f'DELETE FROM archived WHERE id IN ({placeholders})', chunk).rowcount
+    _mark_written('archived')
+    return deleted
+
+def tier_archive(older_than_days=ARCHIVE_HOT_DAYS, batch_size=MIGRATION_BATCH_SIZE):
+    """Move archived rows picked up more than `older_than_days` ago into per-year files
 
-def archive_item(item, pickup_date):
-    """Move item from inventory to archived"""
+    Rows move in batches: each is copied into the year's file on a
+    connection of its own, then removed from the hot database by a job on
+    the write queue, so other writes never wait long behind it. A crash
+    between the two can leave a row in both; rerunning moves it again
+    (INSERT OR IGNORE) and removes the hot copy.
+    """
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
+        conn = get_connection()
+        cutoff = int(time.time()) - int(older_than_days) * 86400
+        years = [row[0] for row in conn.execute(
+            "SELECT DISTINCT CAST(strftime('%Y', pickupEpoch, 'unixepoch') AS INTEGER) "
+            "FROM archived WHERE pickupEpoch < ?", (cutoff,)
+        )]
         
-        # Add to archived
-        cursor.execute('''
-            INSERT INTO archived 
-            (id, ownerName, emailId, ssoId, objectStored, uniqueId, location, timePeriod, dateAdded, expiryDate, pickupDate)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            item['id'],
-            item['ownerName'],
-            item['emailId'],
-            item['ssoId'],
-            item['objectStored'],
-            item['uniqueId'],
-            item['location'],
-            item['timePeriod'],
-            item['dateAdded'],
-            item['expiryDate'],
-            pickup_date
-        ))
+        names = ARCHIVED_COLUMNS + tuple(epoch for epoch, _ in EPOCH_COLUMNS['archived'])
+        columns = ', '.join(names)
+        insert = f'INSERT OR IGNORE INTO archived ({columns}) VALUES ({", ".join("?" * len(names))})'
+        moved = 0
+        if years:
+            os.makedirs(_tier_dir(), exist_ok=True)
         
-        # Remove from inventory
-        cursor.execute('DELETE FROM inventory WHERE id = ?', (item['id'],))
+        for year in years:
+            start, end = _year_bounds(year)
+            params = (start, min(end, cutoff), batch_size)
+            
+            tier = sqlite3.connect(_tier_path(year), timeout=BUSY_TIMEOUT)
+            try:
+                with tier:
+                    _ensure_tier_schema(tier, 'main')
+                while True:
+                    rows = conn.execute(f'SELECT {columns} FROM archived WHERE pickupEpoch >= ? AND pickupEpoch < ? '
+                                        'ORDER BY rowid LIMIT ?', params).fetchall()
+                    if not rows:
+                        break
+                    with tier:
+                        tier.executemany(insert, rows)
+                    moved += submit_write(_delete_archived, [row[0] for row in rows]).result()
+                    if len(rows) < batch_size:
+                        break
+            finally:
+                tier.close()
         
-        conn.commit()
-        conn.close()
-        return {'success': True, 'message': 'Item archived successfully'}
+        return {'success': True, 'message': f'Moved {moved} archived items to cold storage', 'moved': moved, 'years': years}
     except Exception as e:
-        return {'success': False, 'message': f'Error archiving item: {str(e)}'}
+        return {'success': False, 'message': f'Error tiering archive: {str(e)}', 'moved': 0}
+
+def _get_archived_range(since, until):
+    """Archived records with since <= pickupDate < until, across hot and cold tiers"""
+    items = []
+    for cursor in _archived_range_cursors(since, until):
+        items.extend(cursor.fetchall())
+    return items
+
+def _archived_range_cursors(since, until):
+    """Cursors over the hot archive, then each overlapping tier (attached while its cursor is read)"""
+    conn = get_connection()
+    bounds = conn.execute(f'SELECT {_epoch_sql("?")}, {_epoch_sql("?")}', (since, until)).fetchone()
+    if (since is not None and bounds[0] is None) or (until is not None and bounds[1] is None):
+        raise ValueError('since/until must be ISO dates')
+    low = bounds[0] if bounds[0] is not None else -2**62
+    high = bounds[1] if bounds[1] is not None else 2**62
+    
+    where = 'WHERE pickupEpoch >= ? AND pickupEpoch < ?'
+    yield _select(True, where, (low, high))
+    
+    for year in archive_tier_years():
+        start, end = _year_bounds(year)
+        if start < high and low < end:
+            with _attached_tier(year) as schema:
+                yield _select(True, where, (low, high), schema=schema)
+
+# ==================== BULK IMPORT ====================
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MODES = ('skip', 'upsert', 'fail')
+
+# Bound variables per statement; SQLite before 3.32 allowed only 999
+MAX_SQL_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+_IMPORT_CONFLICT = {
+    'skip': ' ON CONFLICT DO NOTHING',
+    'upsert': ''' ON CONFLICT(id) DO UPDATE SET
+        ownerName = excluded.ownerName,
+        emailId = excluded.emailId,
+        ssoId = excluded.ssoId,
+        objectStored = excluded.objectStored,
+        uniqueId = excluded.uniqueId,
+        location = excluded.location,
+        timePeriod = excluded.timePeriod,
+        dateAdded = excluded.dateAdded,
+        expiryDate = excluded.expiryDate,
+        dateAddedEpoch = excluded.dateAddedEpoch,
+        expiryEpoch = excluded.expiryEpoch
+    ''',
+    'fail': '',
+}
 
-def import_items(items):
-    """Import multiple items at once"""
+@functools.lru_cache(maxsize=64)
+def _import_sql(mode, rows=1):
+    """Multi-row INSERT for one import mode"""
+    return _insert_sql('inventory', ITEM_COLUMNS, rows) + _IMPORT_CONFLICT[mode]
+
+def _import_chunk(conn, mode, rows):
+    """Insert rows with as few statements as the variable limit allows
+
+    One statement per batch of rows rather than executemany: the FTS index
+    triggers flush the pending index at every statement boundary, which made
+    executemany imports ~20x slower.
+    """
+    per_statement = MAX_SQL_VARIABLES // len(ITEM_COLUMNS)
+    changed = 0
+    for start in range(0, len(rows), per_statement):
+        batch = rows[start:start + per_statement]
+        params = [value for row in batch for value in row]
+        changed += conn.execute(_import_sql(mode, len(batch)), params).rowcount
+    return changed
+
+class ImportAborted(Exception):
+    """Raised inside import_items() to roll back a 'fail' mode import"""
+
+def _import_row(item):
+    """Validate one import row and return its parameter tuple (raises ValueError)"""
+    if not isinstance(item, dict):
+        raise ValueError('Row is not an object')
+    
+    missing = [column for column in ITEM_COLUMNS if item.get(column) in (None, '')]
+    if missing:
+        raise ValueError(f'Missing field(s): {", ".join(missing)}')
+    
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
+        time_period = int(item['timePeriod'])
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid timePeriod: {item['timePeriod']!r}")
+    
+    return (
+        str(item['id']),
+        item['ownerName'],
+        item['emailId'],
+        item['ssoId'],
+        item['objectStored'],
+        str(item['uniqueId']),
+        item['location'],
+        time_period,
+        item['dateAdded'],
+        item['expiryDate']
+    )
+
+def _row_error(index, item, message):
+    """Build one entry of the per-row import error report"""
+    item = item if isinstance(item, dict) else {}
+    return {'row': index, 'id': item.get('id'), 'uniqueId': item.get('uniqueId'), 'error': message}
+
+def _find_duplicates(conn, chunk, seen_ids, seen_unique_ids):
+    """Split a chunk of (index, item, params) into (new rows, duplicate rows)"""
+    ids = [params[0] for _, _, params in chunk]
+    unique_ids = [params[5] for _, _, params in chunk]
+    
+    placeholders = ', '.join('?' * len(chunk))
+    existing = conn.execute(
+        f'SELECT id, uniqueId FROM inventory WHERE id IN ({placeholders}) OR uniqueId IN ({placeholders})',
+        ids + unique_ids
+    ).fetchall()
+    existing_ids = {row[0] for row in existing}
+    existing_unique_ids = {row[1] for row in existing}
+    
+    fresh, duplicates = [], []
+    for entry in chunk:
+        item_id, unique_id = entry[2][0], entry[2][5]
+        if (item_id in existing_ids or item_id in seen_ids
+                or unique_id in existing_unique_ids or unique_id in seen_unique_ids):
+            duplicates.append(entry)
+        else:
+            fresh.append(entry)
+            seen_ids.add(item_id)
+            seen_unique_ids.add(unique_id)
+    return fresh, duplicates
+
+def _import_chunks(conn, mode, chunks, seen_ids, seen_unique_ids, errors):
+    """Writer job: import chunks of validated (index, item, params) rows
+
+    Returns (imported, skipped); rejected rows are added to errors. A bad
+    row in 'fail' mode raises ImportAborted, rolling back the whole job.
+    """
+    change_op = 'update' if mode == 'upsert' else 'insert'
+    imported = skipped = 0
+    for chunk in chunks:
+        if mode == 'skip':
+            chunk, duplicates = _find_duplicates(conn, chunk, seen_ids, seen_unique_ids)
+            skipped += len(duplicates)
+            for index, item, params in duplicates:
+                errors.append(_row_error(index, item, f'Duplicate ID: {params[5]}'))
         
-        success_count = 0
-        errors = []
+        conn.execute('SAVEPOINT import_chunk')
+        try:
+            imported += _import_chunk(conn, mode, [params for _, _, params in chunk])
+            _log_changes(conn, change_op, [params[0] for _, _, params in chunk])
+            conn.execute('RELEASE import_chunk')
+            continue
+        except sqlite3.Error:
+            conn.execute('ROLLBACK TO import_chunk')
         
-        for item in items:
+        # Replay the failed chunk row by row to pinpoint bad rows
+        for index, item, params in chunk:
             try:
-                cursor.execute('''
-                    INSERT INTO inventory 
-                    (id, ownerName, emailId, ssoId, objectStored, uniqueId, location, timePeriod, dateAdded, expiryDate)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    item['id'],
-                    item['ownerName'],
-                    item['emailId'],
-                    item['ssoId'],
-                    item['objectStored'],
-                    item['uniqueId'],
-                    item['location'],
-                    item['timePeriod'],
-                    item['dateAdded'],
-                    item['expiryDate']
-                ))
-                success_count += 1
-            except sqlite3.IntegrityError:
-                errors.append(f"Duplicate ID: {item['uniqueId']}")
-        
-        conn.commit()
-        conn.close()
+                if conn.execute(_import_sql(mode), params).rowcount:
+                    imported += 1
+                    _log_changes(conn, change_op, [params[0]])
+            except sqlite3.Error as e:
+                if mode == 'fail':
+                    raise ImportAborted(_row_error(index, item, str(e)))
+                errors.append(_row_error(index, item, str(e)))
+        conn.execute('RELEASE import_chunk')
+    return imported, skipped
+
+def import_items(items, mode='skip', chunk_size=IMPORT_CHUNK_SIZE):
+    """Import multiple items at once
+
+    Rows are validated up front, then written with multi-row INSERTs in
+    chunks, each chunk inside its own SAVEPOINT. If a chunk fails it is rolled back
+    and replayed row by row so only the offending rows are rejected.
+
+    mode:
+        'skip'   - keep existing rows, report duplicates (default)
+        'upsert' - replace existing rows that have the same id
+        'fail'   - any bad row aborts the whole import
+
+    Returns count/skipped plus an `errors` list with one entry per rejected
+    row: {'row', 'id', 'uniqueId', 'error'}.
+    
+    Each chunk is a separate job on the write queue, so other writes are
+    not held up behind a long import; a 'fail' import is a single job, so
+    it commits all or nothing.
+    """
+    if mode not in IMPORT_MODES:
+        return {'success': False, 'message': f'Unknown import mode: {mode}', 'count': 0, 'errors': []}
+    
+    # Validate everything before touching the database
+    errors = []
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, item, _import_row(item)))
+        except ValueError as e:
+            errors.append(_row_error(index, item, str(e)))
+    
+    if errors and mode == 'fail':
+        return {'success': False, 'message': f'Import aborted: {len(errors)} invalid row(s)', 'count': 0, 'errors': errors}
+    
+    success_count = 0
+    skipped_count = 0
+    seen_ids, seen_unique_ids = set(), set()
+    chunks = [valid[start:start + chunk_size] for start in range(0, len(valid), chunk_size)]
+    jobs = [chunks] if mode == 'fail' else [[chunk] for chunk in chunks]
+    
+    try:
+        for job in jobs:
+            imported, skipped = submit_write(_import_chunks, mode, job, seen_ids, seen_unique_ids, errors).result()
+            success_count += imported
+            skipped_count += skipped
         
+        errors.sort(key=lambda error: error['row'])
         return {
             'success': True, 
             'message': f'Imported {success_count} items', 
             'count': success_count,
+            'skipped': skipped_count,
             'errors': errors
         }
+    except ImportAborted as e:
+        return {'success': False, 'message': 'Import aborted and rolled back', 'count': 0, 'errors': [e.args[0]]}
+    except Exception as e:
+        # Chunks before the failing one stay committed
+        return {'success': False, 'message': f'Error importing items: {str(e)}', 'count': success_count,
+                'errors': errors}
+
+# ==================== FILTERED QUERIES ====================
+
+def _hours_from_now(hours):
+    """Epoch seconds `hours` from now (used for relative expiry filters)"""
+    return int(time.time() + float(hours) * 3600)
+
+# Filter name -> (SQL condition, value converter); values are always bound
+QUERY_FILTERS = {
+    'emailId': ('emailId = ?', str),
+    'ssoId': ('ssoId = ?', str),
+    'location': ('location = ?', str),
+    'uniqueId': ('uniqueId = ?', str),
+    'expiresBefore': ('expiryEpoch < ' + _epoch_sql('?'), str),
+    'expiresAfter': ('expiryEpoch >= ' + _epoch_sql('?'), str),
+    'expiresWithinHours': ('expiryEpoch < ?', _hours_from_now),  # includes overdue items
+    'expiringWithinHours': ("expiryEpoch BETWEEN CAST(strftime('%s', 'now') AS INTEGER) AND ?", _hours_from_now),
+}
+
+# Sort columns served by an epoch index instead (same order for ISO dates)
+ORDER_EPOCHS = {'expiryDate': 'expiryEpoch'}
+
+def query_items(filters=None, order_by=None, limit=None, archived=False):
+    """Get items matching filters, evaluated in SQL
+
+    filters: dict of QUERY_FILTERS names to values, combined with AND
+    order_by: column name, prefix with '-' for descending
+    limit: maximum number of rows
+    archived: query the archived table instead of inventory
+    """
+    try:
+        sql, params = _query_sql(filters, order_by, limit, archived)
+        items = _select(archived, sql, params).fetchall()
+        
+        return {'success': True, 'items': items}
+    except Exception as e:
+        return {'success': False, 'message': f'Error querying items: {str(e)}', 'items': []}
+
+def _query_sql(filters, order_by, limit, archived):
+    """WHERE/ORDER BY/LIMIT clause and parameters for query_items()"""
+    columns = _record_type(archived)._fields
+    
+    conditions = []
+    params = []
+    for name, value in (filters or {}).items():
+        if name not in QUERY_FILTERS:
+            raise ValueError(f'Unknown filter: {name}')
+        condition, convert = QUERY_FILTERS[name]
+        conditions.append(condition)
+        params.append(convert(value))
+    
+    sql = ''
+    if conditions:
+        sql += 'WHERE ' + ' AND '.join(conditions)
+    
+    if order_by:
+        column = order_by.lstrip('-')
+        if column not in columns:
+            raise ValueError(f'Cannot order by: {order_by}')
+        sql += f' ORDER BY {ORDER_EPOCHS.get(column, column)} {"DESC" if order_by.startswith("-") else "ASC"}'
+    
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(int(limit))
+    
+    return sql, params
+
+# ==================== FULL-TEXT SEARCH ====================
+
+MAX_SEARCH_RESULTS = 100
+SEARCH_SCOPES = ('all', 'inventory', 'archived')
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    words = re.findall(r'\w+', text, re.UNICODE)
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+
+def _search_row(cursor, row):
+    """Row factory for search results: record type chosen by the source table"""
+    if row[0] == 'archived':
+        return tuple.__new__(ArchivedItem, row[1:-1])
+    return tuple.__new__(InventoryItem, row[1:-2])
+
+def search_items(q, limit=20, offset=0, scope='all'):
+    """Ranked full-text search over owner, object, location, tag and SSO ID
+
+    Partial words match (prefix search). Results are ordered by bm25 rank;
+    page with limit/offset. scope is 'all', 'inventory' or 'archived'.
+    Archived results carry pickupDate; only the hot archive is searched.
+    An unknown scope or a non-integer limit/offset raises ValueError.
+    """
+    if scope not in SEARCH_SCOPES:
+        raise ValueError(f'Unknown search scope: {scope}')
+    limit = max(1, min(int(limit), MAX_SEARCH_RESULTS))
+    offset = max(0, int(offset))
+    try:
+        match = _fts_query(q or '')
+        if not match:
+            return {'success': True, 'items': [], 'nextOffset': None}
+        
+        item_columns = ', '.join(f't.{column}' for column in ITEM_COLUMNS)
+        parts, params = [], []
+        for table in ('inventory', 'archived'):
+            if scope not in ('all', table):
+                continue
+            pickup = 't.pickupDate' if table == 'archived' else 'NULL'
+            parts.append(f'''
+                SELECT '{table}', {item_columns}, {pickup}, bm25({table}_fts) AS rank
+                FROM {table}_fts JOIN {table} t ON t.rowid = {table}_fts.rowid
+                WHERE {table}_fts MATCH ?
+            ''')
+            params.append(match)
+        
+        sql = ' UNION ALL '.join(parts) + ' ORDER BY rank LIMIT ? OFFSET ?'
+        cursor = get_connection().cursor()
+        cursor.row_factory = _search_row
+        items = cursor.execute(sql, params + [limit + 1, offset]).fetchall()
+        
+        next_offset = offset + limit if len(items) > limit else None
+        return {'success': True, 'items': items[:limit], 'nextOffset': next_offset}
+    except sqlite3.Error as e:
+        return {'success': False, 'message': f'Error searching items: {str(e)}', 'items': [], 'nextOffset': None}
+
+# ==================== CHANGE FEED ====================
+
+MAX_CHANGES = 1000
+
+def _current_rows(archived, ids):
+    """Records for the given ids, keyed by id"""
+    ids = list(ids)
+    rows = {}
+    for start in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[start:start + _IN_CHUNK]
+        placeholders = ', '.join('?' * len(chunk))
+        rows.update((row.id, row) for row in _select(archived, f'WHERE id IN ({placeholders})', chunk))
+    return rows
+
+def _logged_seq(conn):
+    """Sequence number of the last change ever logged (0 before the first)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+    return row[0] if row else 0
+
+def change_version():
+    """(last change seq, epoch seconds it was logged): the change feed's version
+
+    Unlike table_version() this reads the database, so it also sees writes
+    made through this module by other processes. Only the newest log row
+    is looked at.
+    """
+    try:
+        row = get_connection().execute('SELECT seq, changedAt FROM changes ORDER BY seq DESC LIMIT 1').fetchone()
+    except sqlite3.Error:
+        row = None
+    return row if row else (0, _cache_modified['inventory'])
+
+# get_changes() snapshot: (inventory body, archived body, response, response bytes)
+_snapshot = None
+_SNAPSHOT_ITEMS = len('{"success": true, "items": ')  # where the array starts in a cached body
+
+def _changes_snapshot():
+    """(response, encoded JSON) of a get_changes() snapshot, built from the read cache
+
+    Both stay the same objects until a write replaces a cache entry, so
+    the encoded copy (and the server's compressed copy of it) is made
+    once per write rather than once per request.
+    """
+    global _snapshot, _settled
+    # Read before the entries: every change up to it has had its stale entries dropped,
+    # so the records include it (a later one may be included too; clients just repeat it)
+    with _cache_lock:
+        db_file, last_seq = _settled
+    if db_file != DB_FILE:
+        # Nothing written through this module yet; the writer runs this only
+        # after any commit in progress has dropped its entries
+        last_seq = submit_write(_logged_seq).result()
+        with _cache_lock:
+            if _settled[0] != DB_FILE:
+                _settled = (DB_FILE, last_seq)
+    
+    items, items_body = _cached('inventory')
+    archived, archived_body = _cached('archived')
+    snapshot = _snapshot
+    if snapshot is not None and snapshot[0] is items_body and snapshot[1] is archived_body:
+        return snapshot[2:]
+    
+    # dumps() encodes records only under 'items'
+    response = {'success': True, 'snapshot': True, 'items': items, 'archived': [item.to_dict() for item in archived],
+                'lastSeq': last_seq, 'hasMore': False}
+    body = b''.join([b'{"success": true, "snapshot": true, "items": ', items_body[_SNAPSHOT_ITEMS:-1],
+                     b', "archived": ', archived_body[_SNAPSHOT_ITEMS:-1],
+                     f', "lastSeq": {last_seq}, "hasMore": false}}'.encode('ascii')])
+    _snapshot = (items_body, archived_body, response, body)
+    return response, body
+
+def get_changes_snapshot_json():
+    """A get_changes() snapshot as encoded JSON bytes (the same object until the next write)"""
+    return _changes_snapshot()[1]
+
+def get_changes(since=None, limit=MAX_CHANGES):
+    """Changes after sequence number `since`, for incremental sync
+
+    Returns {'changes': [{'seq', 'op', 'id', 'item'}], 'lastSeq', 'hasMore'}
+    with one entry per item (its latest change in this page). `item` is
+    the row as it is now: from inventory for insert/update, from archived
+    for archive, None for delete or when a later change removed it.
+    Continue from lastSeq while hasMore is true.
+
+    Without `since`, or when the changes after it are no longer kept, the
+    result is a snapshot instead: {'snapshot': True, 'items', 'archived',
+    'lastSeq'} with the full inventory and hot archive, from the read
+    cache (get_changes_snapshot_json() has it pre-encoded). A since or
+    limit that is not an integer raises ValueError.
+    """
+    limit = max(1, min(int(limit), MAX_CHANGES))
+    since = None if since is None else int(since)
+    try:
+        with transaction() as conn:
+            # One read transaction so the rows and lastSeq agree
+            conn.execute('BEGIN')
+            last_seq = _logged_seq(conn)
+            first_kept = conn.execute('SELECT min(seq) FROM changes').fetchone()[0] or last_seq + 1
+            
+            snapshot = since is None or since < first_kept - 1 or since > last_seq
+            if not snapshot:
+                page = conn.execute('SELECT seq, op, itemId FROM changes WHERE seq > ? ORDER BY seq LIMIT ?',
+                                    (since, limit + 1)).fetchall()
+                has_more = len(page) > limit
+                page = page[:limit]
+                
+                latest = {}
+                for seq, op, item_id in page:
+                    latest.pop(item_id, None)
+                    latest[item_id] = (seq, op)
+                
+                live = _current_rows(False, [item_id for item_id, (_, op) in latest.items()
+                                             if op in ('insert', 'update')])
+                archived = _current_rows(True, [item_id for item_id, (_, op) in latest.items() if op == 'archive'])
+        
+        if snapshot:
+            # Outside the read transaction, which may predate writes the cache has seen
+            return dict(_changes_snapshot()[0])
+        
+        changes = []
+        for item_id, (seq, op) in latest.items():
+            item = (archived if op == 'archive' else live).get(item_id)
+            changes.append({'seq': seq, 'op': op, 'id': item_id, 'item': item.to_dict() if item else None})
+        
+        return {
+            'success': True,
+            'snapshot': False,
+            'changes': changes,
+            'lastSeq': page[-1][0] if page else since,
+            'hasMore': has_more
+        }
+    except sqlite3.Error as e:
+        return {'success': False, 'message': f'Error fetching changes: {str(e)}', 'changes': []}
+
+# ==================== AGGREGATE STATISTICS ====================
+
+EXPIRING_SOON_HOURS = 24  # matches getStatusClass() in js/app.js
+TOP_OWNERS = 20
+
+# (band name, upper bound in days from now); checked in order
+EXPIRY_BANDS = [
+    ('overdue', 0),
+    ('within1Day', 1),
+    ('within3Days', 3),
+    ('within7Days', 7),
+    ('within30Days', 30),
+]
+
+def inventory_stats(now=None):
+    """Counts for dashboards and health checks, computed with GROUP BY in SQL
+
+    The payload size depends on the number of locations and bands, not on
+    the number of items.
+    """
+    try:
+        conn = get_connection()
+        now = int(time.time() if now is None else now)
+        soon = now + EXPIRING_SOON_HOURS * 3600
+        
+        total, expired, expiring_soon = conn.execute('''
+            SELECT count(*),
+                   coalesce(sum(expiryEpoch <= ?), 0),
+                   coalesce(sum(expiryEpoch > ? AND expiryEpoch <= ?), 0)
+            FROM inventory
+        ''', (now, now, soon)).fetchone()
+        
+        by_location = dict(conn.execute(
+            'SELECT location, count(*) FROM inventory GROUP BY location ORDER BY count(*) DESC'
+        ).fetchall())
+        
+        top_owners = [
+            {'emailId': email, 'ownerName': name, 'count': count}
+            for email, name, count in conn.execute('''
+                SELECT emailId, max(ownerName), count(*) FROM inventory
+                GROUP BY emailId ORDER BY count(*) DESC LIMIT ?
+            ''', (TOP_OWNERS,))
+        ]
+        owner_count = conn.execute('SELECT count(DISTINCT emailId) FROM inventory').fetchone()[0]
+        
+        band_case = ' '.join(f"WHEN expiryEpoch <= {now + days * 86400} THEN '{name}'" for name, days in EXPIRY_BANDS)
+        by_band = {name: 0 for name, _ in EXPIRY_BANDS}
+        by_band['later'] = 0
+        by_band.update(conn.execute(f'''
+            SELECT CASE WHEN expiryEpoch IS NULL THEN 'unknown' {band_case} ELSE 'later' END AS band, count(*)
+            FROM inventory GROUP BY band
+        ''').fetchall())
+        
+        archived = conn.execute('SELECT count(*) FROM archived').fetchone()[0]
+        
+        return {
+            'success': True,
+            'stats': {
+                'totalItems': total,
+                'byStatus': {'expired': expired, 'expiringSoon': expiring_soon,
+                             'normal': total - expired - expiring_soon},
+                'byLocation': by_location,
+                'byExpiryBand': by_band,
+                'owners': owner_count,
+                'topOwners': top_owners,
+                'archivedItems': archived,
+                'generatedAt': now
+            }
+        }
     except Exception as e:
-        return {'success': False, 'message': f'Error importing items: {str(e)}'}
+        return {'success': False, 'message': f'Error computing stats: {str(e)}'}
+
+# ==================== PAGINATED AND STREAMING READS ====================
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def _encode_cursor(date_added, item_id):
+    """Pack a (dateAdded, id) keyset position into an opaque URL-safe token"""
+    raw = json.dumps([date_added, item_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def _decode_cursor(cursor):
+    """Unpack a token produced by _encode_cursor (ValueError if it is not one)"""
+    try:
+        date_added, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError('Malformed page cursor')
+    if not isinstance(date_added, str) or not isinstance(item_id, str):
+        raise ValueError('Malformed page cursor')
+    return date_added, item_id
+
+def get_items_page(limit=DEFAULT_PAGE_SIZE, after=None, archived=False):
+    """Get one page of items ordered by (dateAdded, id)
+
+    Pass the returned nextCursor as `after` to fetch the following page;
+    nextCursor is None on the last page. Each page is a single index seek,
+    so deep pages cost the same as the first one. A malformed limit or
+    after cursor raises ValueError.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    position = _decode_cursor(after) if after else None
+    try:
+        sql = ''
+        params = []
+        if position:
+            sql += 'WHERE (dateAdded, id) > (?, ?) '
+            params.extend(position)
+        sql += 'ORDER BY dateAdded, id LIMIT ?'
+        params.append(limit + 1)
+        
+        items = _select(archived, sql, params).fetchall()
+        has_more = len(items) > limit
+        del items[limit:]
+        
+        next_cursor = None
+        if has_more:
+            last = items[-1]
+            next_cursor = _encode_cursor(last.dateAdded, last.id)
+        
+        return {'success': True, 'items': items, 'nextCursor': next_cursor}
+    except Exception as e:
+        return {'success': False, 'message': f'Error fetching page: {str(e)}', 'items': [], 'nextCursor': None}
+
+def main():
+    """Command line entry point: show or apply pending schema migrations, tier the archive"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='AMTC Lab inventory database migrations')
+    parser.add_argument('--plan', action='store_true',
+                       help='Only list pending migrations (dry run)')
+    parser.add_argument('--batch-size', type=int, default=MIGRATION_BATCH_SIZE,
+                       help='Rows per transaction for data migrations')
+    parser.add_argument('--tier-archive', action='store_true',
+                       help='Move old archived items into per-year archive files')
+    parser.add_argument('--older-than-days', type=int, default=ARCHIVE_HOT_DAYS,
+                       help='Age (by pickup date) at which archived items leave the hot database')
+    args = parser.parse_args()
+    
+    if args.tier_archive:
+        migrate_database(batch_size=args.batch_size)
+        result = tier_archive(args.older_than_days, args.batch_size)
+        print(('✅ ' if result['success'] else '❌ ') + result['message'])
+        return
+    
+    plan = migrate_database(dry_run=args.plan, batch_size=args.batch_size)
+    print(f"📊 {DB_FILE}: schema version {plan['current_version']} (latest {plan['target_version']})")
+    if args.plan:
+        for step in plan['pending']:
+            print(f"   📝 Pending {step['version']}: {step['description']}")
+    if not plan['pending']:
+        print("✅ Schema is up to date")
+    elif not args.plan:
+        print(f"✅ Schema migrated to version {schema_version()}")
 
-# Initialize database on import
-if not os.path.exists(DB_FILE):
-    init_database()
+if __name__ == '__main__':
+    main()
+else:
+    # Bring the schema up to date on import
+    migrate_database()
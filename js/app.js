@@ -6,6 +6,9 @@ let currentItems = [];
 let archivedItems = [];
 let currentExtendingItemId = null;
 let currentPickupItemId = null;
+let lastChangeSeq = null;  // last /api/changes sequence applied
+let eventSource = null;    // live /api/events stream, while it is open
+let refreshPending = false; // views are re-rendered once per burst of events
 
 // Initialize the application when the DOM is loaded
 document.addEventListener('DOMContentLoaded', function() {
@@ -19,7 +22,8 @@ document.addEventListener('DOMContentLoaded', function() {
         console.log('✅ XLSX library loaded successfully');
     }
     
-    loadDataFromStorage();
+    // Load everything once, then follow changes as the server pushes them
+    loadDataFromStorage().then(connectEvents);
     updateDashboard();
     updateArchivedDashboard();
     updateStats();
@@ -29,6 +33,9 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Update time remaining every minute
     setInterval(updateTimeRemaining, 60000);
+    
+    // Pull changes made by other users every 30 seconds while live events are unavailable
+    setInterval(syncChanges, 30000);
 });
 
 
@@ -93,12 +100,12 @@ async function handleFormSubmit(event) {
             return;
         }
         
-        // Save to database
-        const success = await saveItemToDatabase(item);
+        // Save to database and queue the storage email in the same request
+        const success = await saveItemToDatabase(item, { type: 'storage' });
         
         if (success) {
-            // Add to local array
-            currentItems.push(item);
+            // Add to local array (the live event for this save may have added it already)
+            applyChange({ op: 'insert', id: item.id, item: item });
             
             // Reset form
             event.target.reset();
@@ -109,9 +116,6 @@ async function handleFormSubmit(event) {
             // Update dashboard
             updateDashboard();
             updateStats();
-            
-            // Send email notification
-            sendEmailNotification(item);
         }
     } catch (error) {
         console.error('Error submitting form:', error);
@@ -267,6 +271,19 @@ function getStatusClass(timeRemaining) {
 
 // Update statistics
 function updateStats() {
+    // Prefer server-side counts (/api/stats); fall back to the loaded items
+    fetch('/api/stats')
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) throw new Error(data.message);
+            const stats = data.stats;
+            renderStats(stats.totalItems, stats.byStatus.expiringSoon, stats.byStatus.expired, stats.archivedItems);
+        })
+        .catch(() => updateStatsLocally());
+}
+
+// Compute statistics from the items already in memory
+function updateStatsLocally() {
     const totalItems = currentItems.length;
     const expiredItems = currentItems.filter(item => {
         const timeRemaining = calculateTimeRemaining(item.expiryDate);
@@ -277,6 +294,10 @@ function updateStats() {
         return timeRemaining.totalHours <= 24 && !timeRemaining.isExpired;
     }).length;
     
+    renderStats(totalItems, expiringSoonItems, expiredItems, archivedItems.length);
+}
+
+function renderStats(totalItems, expiringSoonItems, expiredItems, archivedCount) {
     const totalEl = document.getElementById('total-items');
     if (totalEl) totalEl.textContent = totalItems;
 
@@ -289,13 +310,13 @@ function updateStats() {
 
     // Storage usage/details (optional elements)
     const storageUsageEl = document.getElementById('storage-usage');
-    if (storageUsageEl) storageUsageEl.textContent = `${currentItems.length} items`;
+    if (storageUsageEl) storageUsageEl.textContent = `${totalItems} items`;
     const storageDetailsEl = document.getElementById('storage-details');
-    if (storageDetailsEl) storageDetailsEl.textContent = `${currentItems.length} items stored`;
+    if (storageDetailsEl) storageDetailsEl.textContent = `${totalItems} items stored`;
 
     // Archived count (if present anywhere)
     const archivedCountEl = document.getElementById('archived-count');
-    if (archivedCountEl) archivedCountEl.textContent = archivedItems.length;
+    if (archivedCountEl) archivedCountEl.textContent = archivedCount;
 }
 
 // Update time remaining every minute
@@ -316,9 +337,9 @@ function extendItem(itemId) {
 
 // Confirm extension
 async function confirmExtension() {
-    const additionalDays = parseInt(document.getElementById('extension-days').value);
+    const additionalDays = parseInt(document.getElementById('extend-amount').value);
     if (!additionalDays || additionalDays <= 0) {
-        showMessage('Please enter a valid number of days', 'error');
+        showMessage('Please enter how much more time you need (must be greater than 0).', 'error');
         return;
     }
     
@@ -326,21 +347,21 @@ async function confirmExtension() {
     if (item) {
         const currentExpiry = new Date(item.expiryDate);
         const newExpiry = new Date(currentExpiry.getTime() + (additionalDays * 24 * 60 * 60 * 1000));
-        const newExpiryISO = newExpiry.toISOString();
+        // Time period reflects the new total (original + extension)
+        const updates = { expiryDate: newExpiry.toISOString(), timePeriod: item.timePeriod + additionalDays };
         
-        // Update in database
-        const success = await updateItemInDatabase(item.id, { expiryDate: newExpiryISO });
+        // Update in database; the extension email goes in the same request
+        const notification = { type: 'extension', item: { ...item, ...updates }, additionalDays: additionalDays };
+        const success = await updateItemInDatabase(item.id, updates, notification);
         
         if (success) {
-            item.expiryDate = newExpiryISO;
+            Object.assign(item, updates);
+            applyChange({ op: 'update', id: item.id, item: item });
             
             updateDashboard();
             updateStats();
             
-            showMessage(`✅ Extended ${item.objectStored} by ${additionalDays} day(s) in database`, 'success');
-            
-            // Send extension notification email
-            sendExtensionNotification(item, additionalDays);
+            showMessage(`Perfect! Storage time extended by ${additionalDays} days. Your item now has ${item.timePeriod} total days!`, 'success');
         } else {
             showMessage('❌ Error extending item in database', 'error');
         }
@@ -361,27 +382,22 @@ function pickupItem(itemId) {
 
 // Confirm pickup
 async function confirmPickup() {
-    const itemIndex = currentItems.findIndex(i => i.id === currentPickupItemId);
-    if (itemIndex !== -1) {
-        const item = currentItems[itemIndex];
+    const item = currentItems.find(i => i.id === currentPickupItemId);
+    if (item) {
         item.pickupDate = new Date().toISOString();
         
-        // Archive in database
-        const success = await archiveItemInDatabase(item, item.pickupDate);
+        // Archive in database and queue the pickup email: one request, one commit
+        const success = await archiveItemInDatabase(item, item.pickupDate, { type: 'pickup' });
         
         if (success) {
-            // Move to archived items locally
-            archivedItems.push(item);
-            currentItems.splice(itemIndex, 1);
+            // Move to archived items locally; by id, as the live event may have moved it already
+            applyChange({ op: 'archive', id: item.id, item: item });
             
             updateDashboard();
             updateArchivedDashboard();
             updateStats();
             
             showMessage(`✅ ${item.objectStored} marked as picked up and archived in database`, 'success');
-            
-            // Send pickup confirmation email
-            sendPickupNotification(item);
         } else {
             showMessage('❌ Error archiving item in database', 'error');
         }
@@ -390,18 +406,6 @@ async function confirmPickup() {
     closePickupModal();
 }
 
-// Close modals
-function closeExtendModal() {
-    document.getElementById('extend-modal').style.display = 'none';
-    document.getElementById('extension-days').value = '';
-    currentExtendingItemId = null;
-}
-
-function closePickupModal() {
-    document.getElementById('pickup-modal').style.display = 'none';
-    currentPickupItemId = null;
-}
-
 // Modal functions for extending time
 function openExtendModal(itemId) {
     const item = currentItems.find(i => i.id === itemId);
@@ -418,37 +422,7 @@ function closeExtendModal() {
     currentExtendingItemId = null;
 }
 
-function confirmExtension() {
-    const amount = parseInt(document.getElementById('extend-amount').value);
-
-    if (!amount || amount <= 0) {
-        showMessage('Please enter how much more time you need (must be greater than 0).', 'error');
-        return;
-    }
-
-    const item = currentItems.find(i => i.id === currentExtendingItemId);
-    if (!item) return;
-
-    // Calculate additional time in milliseconds (days only)
-    const additionalMs = amount * 24 * 60 * 60 * 1000;
-
-    // Extend the expiry date
-    const currentExpiry = new Date(item.expiryDate);
-    item.expiryDate = new Date(currentExpiry.getTime() + additionalMs).toISOString();
-
-    // Update time period to reflect the new total (original + extension)
-    item.timePeriod = item.timePeriod + amount;
-
-    saveDataToStorage();
-    updateDashboard();
-    updateStats();
-    closeExtendModal();
-
-    showMessage(`Perfect! Storage time extended by ${amount} days. Your item now has ${item.timePeriod} total days!`, 'success');
-    
-    // Send extension notification
-    sendExtensionNotification(item, amount);
-}// Modal functions for pickup confirmation
+// Modal functions for pickup confirmation
 function openPickupModal(itemId) {
     const item = currentItems.find(i => i.id === itemId);
     if (!item) return;
@@ -463,29 +437,6 @@ function closePickupModal() {
     currentPickupItemId = null;
 }
 
-function confirmPickup() {
-    const item = currentItems.find(i => i.id === currentPickupItemId);
-    if (!item) return;
-    
-    // Add pickup date and move to archived items
-    item.pickupDate = new Date().toISOString();
-    archivedItems.push(item);
-    
-    // Remove from current items
-    currentItems = currentItems.filter(i => i.id !== currentPickupItemId);
-    
-    saveDataToStorage();
-    updateDashboard();
-    updateArchivedDashboard();
-    updateStats();
-    closePickupModal();
-    
-    showMessage('Item successfully marked as picked up and moved to history. Thank you!', 'success');
-    
-    // Send pickup confirmation email
-    sendPickupNotification(item);
-}
-
 // Calculate storage duration
 function calculateStorageDuration(dateAdded, pickedUpDate) {
     const start = new Date(dateAdded);
@@ -558,27 +509,18 @@ function confirmDeleteArchived(itemId) {
 // Load data from SQLite database
 async function loadDataFromStorage() {
     try {
-        // Load current items
-        const itemsResponse = await fetch('/api/items');
-        const itemsData = await itemsResponse.json();
+        // A change feed request without `since` returns a full snapshot.
+        // no-cache: the browser revalidates its copy with If-None-Match and
+        // the server answers 304 while nothing has changed.
+        const response = await fetch('/api/changes', { cache: 'no-cache' });
+        const data = await response.json();
         
-        if (itemsData.success) {
-            currentItems = itemsData.items || [];
-            console.log(`✅ Loaded ${currentItems.length} items from database`);
+        if (data.success) {
+            applySnapshot(data);
+            console.log(`✅ Loaded ${currentItems.length} items and ${archivedItems.length} archived items from database`);
         } else {
-            console.error('❌ Error loading items:', itemsData.message);
+            console.error('❌ Error loading items:', data.message);
             currentItems = [];
-        }
-        
-        // Load archived items
-        const archivedResponse = await fetch('/api/archived');
-        const archivedData = await archivedResponse.json();
-        
-        if (archivedData.success) {
-            archivedItems = archivedData.items || [];
-            console.log(`✅ Loaded ${archivedItems.length} archived items from database`);
-        } else {
-            console.error('❌ Error loading archived items:', archivedData.message);
             archivedItems = [];
         }
         
@@ -595,6 +537,104 @@ async function loadDataFromStorage() {
     }
 }
 
+// Replace local data with a change feed snapshot
+function applySnapshot(data) {
+    currentItems = data.items || [];
+    archivedItems = data.archived || [];
+    lastChangeSeq = data.lastSeq;
+}
+
+// Apply only what changed since the last load or sync
+async function syncChanges() {
+    if (lastChangeSeq === null || (eventSource && eventSource.readyState === EventSource.OPEN)) {
+        return;
+    }
+    
+    try {
+        let changed = false;
+        let hasMore = true;
+        
+        while (hasMore) {
+            const response = await fetch(`/api/changes?since=${lastChangeSeq}`, { cache: 'no-cache' });
+            const data = await response.json();
+            if (!data.success) {
+                console.error('❌ Error syncing changes:', data.message);
+                return;
+            }
+            
+            if (data.snapshot) {
+                applySnapshot(data);
+                changed = true;
+                break;
+            }
+            
+            data.changes.forEach(applyChange);
+            changed = changed || data.changes.length > 0;
+            lastChangeSeq = data.lastSeq;
+            hasMore = data.hasMore;
+        }
+        
+        if (changed) {
+            updateDashboard();
+            updateArchivedDashboard();
+            updateStats();
+        }
+    } catch (error) {
+        console.error('❌ Error syncing changes:', error);
+    }
+}
+
+// Put one change feed entry ({seq, op, id, item}) into the local lists
+function applyChange(change) {
+    currentItems = currentItems.filter(item => item.id !== change.id);
+    archivedItems = archivedItems.filter(item => item.id !== change.id);
+    if (change.item) {
+        (change.op === 'archive' ? archivedItems : currentItems).push(change.item);
+    }
+}
+
+// Re-render at most every 100 ms, so an import's burst of events renders once
+function scheduleRefresh() {
+    if (refreshPending) {
+        return;
+    }
+    refreshPending = true;
+    setTimeout(() => {
+        refreshPending = false;
+        updateDashboard();
+        updateArchivedDashboard();
+        updateStats();
+    }, 100);
+}
+
+// Follow changes pushed by the server (Server-Sent Events). The browser
+// reconnects on its own and resumes after the last event it received;
+// syncChanges() polling covers any time the stream is down.
+function connectEvents() {
+    if (typeof EventSource === 'undefined' || lastChangeSeq === null || eventSource) {
+        return;
+    }
+    
+    eventSource = new EventSource(`/api/events?since=${lastChangeSeq}`);
+    ['added', 'updated', 'archived', 'deleted'].forEach(type => {
+        eventSource.addEventListener(type, event => {
+            const change = JSON.parse(event.data);
+            applyChange(change);
+            lastChangeSeq = change.seq;
+            scheduleRefresh();
+        });
+    });
+    // The changes since our last event are gone from the log: reload everything
+    eventSource.addEventListener('reset', () => loadDataFromStorage());
+    eventSource.onerror = () => {
+        if (eventSource.readyState === EventSource.CLOSED) {
+            // Refused (e.g. single-request server mode): stay on polling
+            console.warn('⚠️ Live updates unavailable, polling for changes');
+            eventSource = null;
+        }
+    };
+}
+
 // Fallback to localStorage if database is unavailable
 function loadFromLocalStorage() {
     try {
@@ -612,15 +652,9 @@ function loadFromLocalStorage() {
 }
 
 // Save item to database
-async function saveItemToDatabase(item) {
+async function saveItemToDatabase(item, notification) {
     try {
-        const response = await fetch('/api/items', {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify(item)
-        });
-        
-        const result = await response.json();
+        const result = await runBatch({ op: 'add', item: item }, notification && { item: item, ...notification });
         
         if (result.success) {
             console.log('✅ Item saved to database');
@@ -641,15 +675,9 @@ async function saveItemToDatabase(item) {
 }
 
 // Update item in database
-async function updateItemInDatabase(itemId, updates) {
+async function updateItemInDatabase(itemId, updates, notification) {
     try {
-        const response = await fetch('/api/items/update', {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({ id: itemId, updates: updates })
-        });
-        
-        const result = await response.json();
+        const result = await runBatch({ op: 'update', id: itemId, updates: updates }, notification);
         
         if (result.success) {
             console.log('✅ Item updated in database');
@@ -666,15 +694,10 @@ async function updateItemInDatabase(itemId, updates) {
 }
 
 // Archive item in database
-async function archiveItemInDatabase(item, pickupDate) {
+async function archiveItemInDatabase(item, pickupDate, notification) {
     try {
-        const response = await fetch('/api/items/archive', {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({ item: item, pickupDate: pickupDate })
-        });
-        
-        const result = await response.json();
+        const result = await runBatch({ op: 'archive', item: item, pickupDate: pickupDate },
+                                      notification && { item: item, ...notification });
         
         if (result.success) {
             console.log('✅ Item archived in database');
@@ -690,6 +713,25 @@ async function archiveItemInDatabase(item, pickupDate) {
     }
 }
 
+// Send a database operation, plus an optional email notification, as one
+// /api/batch request; the email is only queued once the change is committed.
+// Returns the database operation's result.
+async function runBatch(operation, notification) {
+    const operations = [operation];
+    if (notification) {
+        operations.push({ op: 'notify', ...notification });
+    }
+    
+    const response = await fetch('/api/batch', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({ operations: operations })
+    });
+    
+    const batch = await response.json();
+    return batch.results ? batch.results[0] : batch;
+}
+
 // Backup to localStorage
 function saveToLocalStorageBackup() {
     try {
@@ -1016,82 +1058,4 @@ document.addEventListener('keydown', function(event) {
     }
 });
 
-// Email notification functions
-async function sendEmailNotification(item) {
-    try {
-        const response = await fetch('http://localhost:8000/send-notification', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                type: 'storage',
-                item: item
-            })
-        });
-        
-        if (response.ok) {
-            console.log('📧 Storage notification sent successfully');
-        } else {
-            console.log('📧 Email notification failed, but item was stored successfully');
-        }
-    } catch (error) {
-        console.log('📧 Email service unavailable, but item was stored successfully');
-    }
-}
-
-async function sendExtensionNotification(item, additionalDays) {
-    try {
-        const response = await fetch('http://localhost:8000/send-notification', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                type: 'extension',
-                item: item,
-                additionalDays: additionalDays
-            })
-        });
-        
-        if (response.ok) {
-            console.log('📧 Extension notification sent successfully');
-        }
-    } catch (error) {
-        console.log('📧 Email service unavailable for extension notification');
-    }
-}
-
-async function sendPickupNotification(item) {
-    try {
-        const response = await fetch('http://localhost:8000/send-notification', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                type: 'pickup',
-                item: item
-            })
-        });
-        
-        if (response.ok) {
-            console.log('� Pickup notification sent successfully');
-        }
-    } catch (error) {
-        console.log('📧 Email service unavailable for pickup notification');
-    }
-}
-
-// Close modals when clicking outside
-window.onclick = function(event) {
-    const extendModal = document.getElementById('extend-modal');
-    const pickupModal = document.getElementById('pickup-modal');
-    
-    if (event.target === extendModal) {
-        closeExtendModal();
-    }
-    if (event.target === pickupModal) {
-        closePickupModal();
-    }
-};
\ No newline at end of file
+// Email notifications are sent by the server as part of each /api/batch request (see runBatch)
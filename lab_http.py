@@ -0,0 +1,943 @@
+#!/usr/bin/env python3
+"""
+AMTC Lab Management System - shared HTTP handler support
+Pieces used by both BasicLabServer (basic-server.py) and
+LabManagementAPIHandler (api_server.py)
+"""
+
+import io
+import os
+import re
+import gzip
+import json
+import zlib
+import stat
+import time
+import socket
+import hashlib
+import selectors
+import mimetypes
+import logging
+import itertools
+import threading
+import email.utils
+from collections import namedtuple
+from datetime import timezone
+from urllib.parse import parse_qs, unquote, urlsplit
+
+try:
+    import zstandard  # optional: pip install zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Persistent connection settings
+KEEPALIVE_TIMEOUT = 15          # seconds an idle connection is kept open
+REQUEST_TIMEOUT = 30            # seconds a client may stall mid-request
+MAX_KEEPALIVE_REQUESTS = 100    # requests served on one connection before it is closed
+
+# Response compression settings
+COMPRESS_MIN_BYTES = 1024                       # smaller bodies are sent as they are
+COMPRESS_LEVELS = {'gzip': 6, 'zstd': 3}        # per-request (JSON) bodies
+STATIC_COMPRESS_LEVELS = {'gzip': 9, 'zstd': 19}  # static files, compressed once
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'application/xml', 'image/svg+xml')
+MEMO_SIZE = 8                                   # cached JSON bodies kept compressed
+STREAM_CHUNK_BYTES = 64 * 1024                  # bodies longer than this are sent chunked
+
+# Static assets (see StaticAssets)
+STATIC_CACHE_MAX_BYTES = 1024 * 1024            # larger files are sent from disk with sendfile
+STATIC_WATCH_SECONDS = 2                        # how often cached files' mtimes are checked
+STATIC_IMMUTABLE_SECONDS = 365 * 24 * 3600      # max-age for content-hashed (?v=<hash>) URLs
+STATIC_EXTENSIONS = ('.html', '.css', '.js', '.svg', '.ico', '.png', '.jpg', '.gif', '.webp',
+                     '.woff', '.woff2')         # loaded into memory at startup
+
+# Request body limits (Content-Length), per route
+MAX_BODY_BYTES = 1024 * 1024                    # ordinary JSON requests
+MAX_BULK_BODY_BYTES = 64 * 1024 * 1024          # imports and batch endpoints
+
+# Server-Sent Events
+EVENT_HEARTBEAT_SECONDS = 15                    # comment line sent on a quiet stream
+EVENT_RETRY_MS = 3000                           # reconnect delay suggested to the browser
+EVENT_BUFFER_BYTES = 1024 * 1024                # unsent bytes a slow subscriber may hold
+MAX_EVENT_STREAMS = 512                         # open streams per broadcaster (a socket each)
+
+class KeepAliveMixin:
+    """HTTP/1.1 persistent connections for http.server request handlers
+
+    Mix in before the http.server base class. Between requests the socket
+    waits at most KEEPALIVE_TIMEOUT; once a request has started it gets
+    REQUEST_TIMEOUT. The response to the last of MAX_KEEPALIVE_REQUESTS
+    carries "Connection: close". Every response must then send a
+    Content-Length (or close the connection) so the client can find the
+    end of it.
+
+    A server with a park_connection() method (basic-server's pool) takes
+    the idle wait off the handler: each handler serves one request and,
+    if the connection stays open, leaves it in idle_state (buffered
+    reader, requests left) for the server to watch and resume with.
+    """
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; with Nagle on, the body
+    # waits for the client's delayed ACK (~40 ms) on a reused connection
+    disable_nagle_algorithm = True
+    timeout = REQUEST_TIMEOUT
+    keepalive_timeout = KEEPALIVE_TIMEOUT
+    max_requests = MAX_KEEPALIVE_REQUESTS
+    requests_left = MAX_KEEPALIVE_REQUESTS
+    idle_state = None
+
+    def setup(self):
+        super().setup()
+        self.requests_left = self.max_requests
+        resume = getattr(self.server, 'resume_connection', None)
+        state = resume(self.connection) if resume is not None else None
+        if state is not None:
+            # Continue a parked connection with the reader holding its buffered bytes
+            self.rfile.close()
+            self.rfile, self.requests_left = state
+
+    def handle(self):
+        """Serve requests until the client or the request cap closes the connection"""
+        self.close_connection = True
+        self.handle_one_request()
+        if hasattr(self.server, 'park_connection'):
+            if not self.close_connection:
+                self.idle_state = (self.rfile, self.requests_left)
+            return
+        while not self.close_connection:
+            self.connection.settimeout(self.keepalive_timeout)
+            self.handle_one_request()
+
+    def finish(self):
+        if self.idle_state is None:
+            return super().finish()
+        # Parked: the server keeps the socket and the reader
+        if not self.wfile.closed:
+            try:
+                self.wfile.flush()
+            except OSError:
+                pass
+        self.wfile.close()
+
+    def parse_request(self):
+        # The request line has arrived: switch from the idle timeout back
+        # to the per-request one (no socket under the asyncio engine)
+        connection = getattr(self, 'connection', None)
+        if connection is not None:
+            connection.settimeout(self.timeout)
+        self.requests_left -= 1
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        super().send_response(code, message)
+        if self.requests_left <= 0:
+            self.send_header('Connection', 'close')
+
+def accepted_encoding(accept_encoding):
+    """Best encoding the client allows: 'zstd', 'gzip' or None (identity)"""
+    quality = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            quality[coding] = q
+    wildcard = quality.get('*', 0.0)
+    supported = ('zstd', 'gzip') if zstandard is not None else ('gzip',)
+    for coding in supported:
+        if quality.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+def compress(body, encoding, level=None):
+    """Compress body with encoding ('gzip' output is byte-for-byte repeatable)"""
+    level = level if level is not None else COMPRESS_LEVELS[encoding]
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+def compress_stream(chunks, encoding, level=None):
+    """Compress a sequence of chunks as one stream, flushing after each chunk"""
+    level = level if level is not None else COMPRESS_LEVELS[encoding]
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+        flush_mode = zlib.Z_SYNC_FLUSH
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(flush_mode)
+    yield compressor.flush()
+
+def rechunk(chunks, size=STREAM_CHUNK_BYTES):
+    """Join small byte chunks into pieces of at least size bytes (the last may be shorter)"""
+    pending = []
+    pending_bytes = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_bytes += len(chunk)
+        if pending_bytes >= size:
+            yield b''.join(pending)
+            pending = []
+            pending_bytes = 0
+    if pending:
+        yield b''.join(pending)
+
+class StreamedBody:
+    """A response body produced piece by piece
+
+    Creating one produces the first STREAM_CHUNK_BYTES already, so an error
+    in the producer (a bad query) is raised before any header goes out, and
+    a body that fits in that much is complete and can get a Content-Length.
+    """
+
+    def __init__(self, chunks, size=STREAM_CHUNK_BYTES):
+        self.chunks = rechunk(chunks, size)
+        self.first = next(self.chunks, b'')
+        self.complete = len(self.first) < size
+
+    def __iter__(self):
+        return itertools.chain([self.first], self.chunks)
+
+# Compressed copies of long-lived JSON bodies (the database read cache),
+# keyed by the identity of the uncompressed bytes object
+_memo = {}
+_memo_lock = threading.Lock()
+
+def _compress_memo(body, encoding):
+    key = (id(body), encoding)
+    entry = _memo.get(key)
+    if entry is not None and entry[0] is body:
+        return entry[1]
+    compressed = compress(body, encoding)
+    with _memo_lock:
+        if len(_memo) >= MEMO_SIZE:
+            del _memo[next(iter(_memo))]
+        _memo[key] = (body, compressed)
+    return compressed
+
+def not_modified(headers, etag=None, mtime=None):
+    """True when the client's cached copy is still current
+
+    If-None-Match is compared with etag (weakly, so gzip and identity
+    copies match); only without it is If-Modified-Since checked against
+    mtime, as RFC 9110 asks.
+    """
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or etag.removeprefix('W/') in tags
+    if_modified_since = headers.get('If-Modified-Since')
+    if if_modified_since is None or mtime is None:
+        return False
+    try:
+        since = email.utils.parsedate_to_datetime(if_modified_since)
+    except (TypeError, IndexError, OverflowError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return int(mtime) <= since.timestamp()
+
+def compressible(content_type):
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+class CompressionMixin:
+    """gzip (and zstd, if installed) response bodies for http.server handlers
+
+    The encoding is negotiated from Accept-Encoding; bodies under
+    COMPRESS_MIN_BYTES are not worth it and go out unchanged. Long bodies
+    (StreamedBody) are compressed and sent chunk by chunk. Static files
+    are StaticAssetMixin's job.
+    """
+
+    def response_encoding(self):
+        return accepted_encoding(self.headers.get('Accept-Encoding'))
+
+    def encode_body(self, body, memo=False):
+        """Send Content-Encoding, Vary and Content-Length for body; return the bytes to write
+
+        Call between send_response() and end_headers(). memo=True keeps the
+        compressed copy for as long as the same body object is sent again.
+        """
+        encoding = self.response_encoding() if len(body) >= COMPRESS_MIN_BYTES else None
+        if encoding:
+            body = _compress_memo(body, encoding) if memo else compress(body, encoding)
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body)))
+        return body
+
+    def send_body(self, body):
+        """End the headers and write a StreamedBody, chunked unless it is already complete"""
+        if body.complete:
+            data = self.encode_body(body.first)
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        encoding = self.response_encoding()
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+            body = compress_stream(body, encoding)
+        self.send_chunked(body)
+
+    def send_chunked(self, chunks):
+        """End the headers and write chunks with chunked transfer encoding
+
+        HTTP/1.0 clients get the plain bytes, ended by closing the
+        connection. Once the headers are out a failure can no longer
+        become an error response, so it is logged and the connection
+        dropped, which the client sees as a truncated body.
+        """
+        chunked = self.request_version != 'HTTP/1.0'
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                if chunk:  # an empty chunk would end the body
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+            if chunked:
+                self.wfile.write(b'0\r\n\r\n')
+        except OSError:
+            self.close_connection = True
+        except Exception as e:
+            logger.error(f"Error streaming response to {self.client_address[0]}: {e}")
+            self.close_connection = True
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified validators and 304 responses for versioned data
+
+    A handler takes a cheap version of what it is about to send (a
+    (tag, mtime) pair such as database.table_version() returns) before
+    reading the data. send_not_modified() answers 304 when the client
+    already has that version, so the data need not be read at all;
+    otherwise the version goes out with the response via send_validators().
+    """
+
+    def send_not_modified(self, version):
+        """Send 304 and return True if the request's validators match version"""
+        tag, mtime = version
+        if not not_modified(self.headers, f'W/"{tag}"', mtime):
+            return False
+        self.send_response(304)
+        self.send_validators(version)
+        self.end_headers()
+        return True
+
+    def send_validators(self, version):
+        tag, mtime = version
+        self.send_header('ETag', f'W/"{tag}"')
+        self.send_header('Last-Modified', self.date_time_string(mtime))
+        # Revalidate on every use instead of guessing a freshness lifetime
+        self.send_header('Cache-Control', 'no-cache')
+
+# ==================== STATIC ASSETS ====================
+# Site files are read into memory once (preload() at startup, or on their
+# first request) together with their compressed variants and a content
+# hash. A watcher thread re-stats them every STATIC_WATCH_SECONDS and
+# reloads changed ones, so serving a hit never touches the filesystem.
+# HTML pages are cached with their local src/href references rewritten to
+# ?v=<content hash>; those URLs never change meaning and can be cached by
+# browsers for a year.
+
+_ASSET_REFERENCE = re.compile(rb'\b((?:src|href)=")([^"?#:]+)(")')
+
+def content_type_for(path):
+    """MIME type by file extension, as SimpleHTTPRequestHandler guesses it"""
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+class StaticAsset:
+    """One file held in memory: its bytes per encoding and validators"""
+
+    def __init__(self, path, st, raw, content_type):
+        self.path = path
+        self.version = (st.st_mtime_ns, st.st_size)
+        self.mtime = st.st_mtime
+        self.content_type = content_type
+        self.hash = hashlib.sha256(raw).hexdigest()[:16]
+        self.body = {None: raw}  # encoding -> bytes, None being identity
+        if compressible(content_type) and len(raw) >= COMPRESS_MIN_BYTES:
+            for encoding in STATIC_COMPRESS_LEVELS:
+                if encoding == 'zstd' and zstandard is None:
+                    continue
+                compressed = compress(raw, encoding, STATIC_COMPRESS_LEVELS[encoding])
+                if len(compressed) < len(raw):
+                    self.body[encoding] = compressed
+
+    def etag(self, encoding):
+        """Strong ETag of the bytes sent for encoding"""
+        return f'"{self.hash}-{encoding}"' if encoding else f'"{self.hash}"'
+
+class StaticAssets:
+    """Registry of StaticAsset by absolute file path"""
+
+    def __init__(self):
+        self.root = None
+        self.assets = {}
+        self.lock = threading.Lock()
+        self.watcher = None
+
+    def preload(self, root):
+        """Load every STATIC_EXTENSIONS file under root (skipping hidden and __ directories)"""
+        self.root = os.path.abspath(root)
+        pages = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if not name.startswith(('.', '__'))]
+            for name in filenames:
+                if name.endswith('.html'):
+                    pages.append(os.path.join(dirpath, name))
+                elif name.endswith(STATIC_EXTENSIONS):
+                    self.load(os.path.join(dirpath, name))
+        # Pages last, so their references can be versioned
+        for path in pages:
+            self.load(path)
+        logger.info(f"Static assets: {len(self.assets)} files in memory")
+
+    def get(self, path):
+        """The cached asset for a file path, loading it on first use; None if not cacheable"""
+        asset = self.assets.get(path)
+        if asset is None and (path.endswith(STATIC_EXTENSIONS) or compressible(content_type_for(path))):
+            asset = self.load(path)
+        return asset
+
+    def load(self, path):
+        """(Re)read path into the cache; None, and nothing cached, if it is not a small regular file"""
+        try:
+            st = os.stat(path)
+            if not stat.S_ISREG(st.st_mode) or st.st_size > STATIC_CACHE_MAX_BYTES:
+                return None
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except OSError:
+            return None
+        content_type = content_type_for(path)
+        if content_type == 'text/html':
+            raw = self.versioned_references(path, raw)
+        asset = StaticAsset(path, st, raw, content_type)
+        with self.lock:
+            self.assets[path] = asset
+            if self.watcher is None:
+                self.watcher = threading.Thread(target=self.watch, name='static-watcher', daemon=True)
+                self.watcher.start()
+        return asset
+
+    def versioned_references(self, page, raw):
+        """Page bytes with src/href to other cached local assets given ?v=<hash>"""
+        def versioned(match):
+            reference = unquote(match.group(2).decode('utf-8', 'replace'))
+            if reference.startswith('/'):
+                if self.root is None:
+                    return match.group(0)
+                target = os.path.join(self.root, reference.lstrip('/'))
+            else:
+                target = os.path.join(os.path.dirname(page), reference)
+            target = os.path.normpath(target)
+            # Links to other pages are navigation, not assets
+            asset = None if target.endswith('.html') else self.assets.get(target) or self.get(target)
+            if asset is None:
+                return match.group(0)
+            return match.group(1) + match.group(2) + b'?v=' + asset.hash.encode('ascii') + match.group(3)
+        return _ASSET_REFERENCE.sub(versioned, raw)
+
+    def watch(self):
+        """Watcher thread: reload files whose mtime or size changed, forget deleted ones"""
+        while True:
+            time.sleep(STATIC_WATCH_SECONDS)
+            changed = False
+            for path, asset in list(self.assets.items()):
+                try:
+                    st = os.stat(path)
+                    current = (st.st_mtime_ns, st.st_size) == asset.version
+                except OSError:
+                    current = False
+                if not current:
+                    changed = True
+                    if self.load(path) is None:
+                        with self.lock:
+                            self.assets.pop(path, None)
+            if changed:
+                # Pages carry their assets' hashes
+                for path, asset in list(self.assets.items()):
+                    if asset.content_type == 'text/html':
+                        self.load(path)
+
+    def info(self):
+        """Number of cached files and their bytes (identity and compressed)"""
+        assets = list(self.assets.values())
+        return {'files': len(assets), 'bytes': sum(len(body) for asset in assets for body in asset.body.values())}
+
+static_assets = StaticAssets()
+
+class StaticAssetMixin:
+    """Serve static files from static_assets for SimpleHTTPRequestHandler
+
+    A cached file is answered from memory in the best encoding the client
+    accepts, with a strong ETag (304 when If-None-Match matches). A
+    request carrying the file's current hash as ?v= is marked immutable
+    for STATIC_IMMUTABLE_SECONDS; any other URL gets no-cache, so the
+    browser revalidates it and usually gets a 304. Files the cache does
+    not hold fall through to SimpleHTTPRequestHandler, and their bodies
+    are sent with sendfile.
+    """
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        asset = static_assets.get(os.path.join(path, 'index.html') if path.endswith(os.sep) else path)
+        if asset is None:
+            return super().send_head()
+
+        encoding = self.response_encoding()
+        if encoding not in asset.body:
+            encoding = None
+        etag = asset.etag(encoding)
+        versioned = parse_qs(urlsplit(self.path).query).get('v') == [asset.hash]
+        if not_modified(self.headers, etag, asset.mtime):
+            self.send_response(304)
+            self.send_asset_validators(etag, asset, versioned)
+            self.end_headers()
+            return None
+
+        body = asset.body[encoding]
+        self.send_response(200)
+        self.send_header('Content-type', asset.content_type)
+        self.send_asset_validators(etag, asset, versioned)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if len(asset.body) > 1:
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def send_asset_validators(self, etag, asset, versioned):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', self.date_time_string(asset.mtime))
+        if versioned:
+            self.send_header('Cache-Control', f'public, max-age={STATIC_IMMUTABLE_SECONDS}, immutable')
+        else:
+            self.send_header('Cache-Control', 'no-cache')
+
+    def copyfile(self, source, outputfile):
+        """Copy a response body, using sendfile for files on disk"""
+        if isinstance(source, io.BytesIO):
+            return super().copyfile(source, outputfile)
+        sendfile = getattr(outputfile, 'sendfile', None)  # async_server.LoopWriter
+        connection = getattr(self, 'connection', None)
+        if sendfile is not None:
+            sendfile(source)
+        elif isinstance(connection, socket.socket):
+            connection.sendfile(source)
+        else:
+            super().copyfile(source, outputfile)
+
+# ==================== ROUTING ====================
+
+class HTTPError(Exception):
+    """Raised in a route handler (or the body reader) to answer with an error status"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+Route = namedtuple('Route', 'method pattern handler max_body regex')
+
+_PATH_PARAM = re.compile(r'\{(\w+)\}')
+
+class Router:
+    """Route table: (method, path pattern) -> name of a handler method
+
+    A pattern is a literal path or has {name} segments, each matching one
+    path segment and passed to the handler as a keyword argument (URL
+    decoded). Literal paths are one dict lookup; patterns are tried in
+    table order. Every dispatched request is timed: per-route totals are
+    kept for stats(), and each callable in timing_hooks is called with
+    (route, status, seconds) afterwards.
+    """
+
+    def __init__(self, routes=()):
+        self.exact = {}
+        self.patterns = []
+        self.timing_hooks = []
+        self.timings = {}
+        self.timings_lock = threading.Lock()
+        for route in routes:
+            self.add(*route)
+
+    def add(self, method, pattern, handler, max_body=MAX_BODY_BYTES):
+        regex = None
+        parts = _PATH_PARAM.split(pattern)  # literal, name, literal, ...
+        if len(parts) > 1:
+            regex = re.compile(''.join(re.escape(part) if i % 2 == 0 else f'(?P<{part}>[^/]+)'
+                                       for i, part in enumerate(parts)))
+        route = Route(method, pattern, handler, max_body, regex)
+        if regex is None:
+            self.exact[method, pattern] = route
+        else:
+            self.patterns.append(route)
+        return route
+
+    def match(self, method, path):
+        """(route, path parameters), or (None, None) when no route matches"""
+        route = self.exact.get((method, path))
+        if route is not None:
+            return route, {}
+        for route in self.patterns:
+            if route.method == method:
+                match = route.regex.fullmatch(path)
+                if match:
+                    return route, {name: unquote(value) for name, value in match.groupdict().items()}
+        return None, None
+
+    def record(self, route, status, seconds):
+        """Add one request to the route's timings and run the timing hooks"""
+        key = f'{route.method} {route.pattern}'
+        with self.timings_lock:
+            entry = self.timings.get(key)
+            if entry is None:
+                entry = self.timings[key] = {'count': 0, 'errors': 0, 'totalSeconds': 0.0, 'maxSeconds': 0.0}
+            entry['count'] += 1
+            entry['errors'] += status is None or status >= 500
+            entry['totalSeconds'] += seconds
+            entry['maxSeconds'] = max(entry['maxSeconds'], seconds)
+        for hook in self.timing_hooks:
+            hook(route, status, seconds)
+
+    def stats(self):
+        """Per-route request count, server errors and mean/max time in milliseconds"""
+        with self.timings_lock:
+            return {key: {'count': entry['count'], 'errors': entry['errors'],
+                          'meanMs': round(entry['totalSeconds'] / entry['count'] * 1000, 3),
+                          'maxMs': round(entry['maxSeconds'] * 1000, 3)}
+                    for key, entry in self.timings.items()}
+
+_UNREAD = object()
+
+class RouterMixin:
+    """Dispatch requests through the handler class's `router` table
+
+    do_GET/do_POST call dispatch(), which returns False when no route
+    matches so the caller can fall back (static files, 404). Handlers
+    read the query string from self.query, and the request body through
+    read_body()/json_body(), which enforce the route's max_body and parse
+    the JSON only once. HTTPError raised from a handler becomes
+    send_route_error(status, message).
+    """
+    router = None
+
+    def send_response(self, code, message=None):
+        self.response_status = code
+        super().send_response(code, message)
+
+    def dispatch(self):
+        url = urlsplit(self.path)
+        route, params = self.router.match(self.command, url.path)
+        if route is None:
+            return False
+
+        self.route = route
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.response_status = None
+        self._body = None
+        self._json = _UNREAD
+        start = time.perf_counter()
+        try:
+            if self.content_length() > route.max_body:
+                raise HTTPError(413, f'Request body too large (limit {route.max_body} bytes)')
+            getattr(self, route.handler)(**params)
+        except HTTPError as e:
+            self.send_route_error(e.status, e.message)
+        except Exception as e:
+            logger.error(f"Error in {route.method} {route.pattern}: {e}")
+            if self.response_status is None:
+                self.send_route_error(500, f'Internal server error: {str(e)}')
+            else:
+                self.close_connection = True
+        finally:
+            if self._body is None and self.content_length(default=0):
+                # Unread body: it must not be parsed as the next request
+                self.close_connection = True
+            self.router.record(route, self.response_status, time.perf_counter() - start)
+        return True
+
+    def content_length(self, default=None):
+        """The request's Content-Length (0 when absent); HTTPError 400 if malformed"""
+        value = self.headers.get('Content-Length', '0')
+        try:
+            length = int(value)
+        except ValueError:
+            length = -1
+        if length < 0:
+            if default is not None:
+                return default
+            raise HTTPError(400, 'Bad Content-Length')
+        return length
+
+    def read_body(self):
+        """The request body as bytes (read once, within the route's max_body)"""
+        if self._body is None:
+            self._body = self.rfile.read(self.content_length())
+        return self._body
+
+    def json_body(self):
+        """The request body parsed as JSON (once); HTTPError 400 if empty or invalid"""
+        if self._json is _UNREAD:
+            body = self.read_body()
+            if not body:
+                raise HTTPError(400, 'No data provided')
+            try:
+                self._json = json.loads(body)
+            except (UnicodeDecodeError, ValueError):
+                raise HTTPError(400, 'Invalid JSON data')
+        return self._json
+
+    def send_route_error(self, status, message):
+        self.send_error(status, message)
+
+# ==================== EVENT STREAMS ====================
+# Server-Sent Events (text/event-stream). A request handler only sends the
+# headers; the connection is then handed to an EventBroadcaster, whose one
+# thread writes the events of every subscriber. An open dashboard holds a
+# socket, not a request thread.
+
+def sse_message(event, data, id=None):
+    """One event-stream message with data encoded as compact JSON"""
+    head = f'id: {id}\n' if id is not None else ''
+    return f'{head}event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'.encode('utf-8')
+
+class SocketSubscriber:
+    """An event stream on a socket taken over from a request handler"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.sock.setblocking(False)
+        self.pending = b''
+
+    def send(self, data):
+        """Queue data and write what the socket takes; False if the subscriber should go"""
+        self.pending += data
+        return self.flush()
+
+    def flush(self):
+        try:
+            sent = self.sock.send(self.pending) if self.pending else 0
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            return False
+        self.pending = self.pending[sent:]
+        return len(self.pending) <= EVENT_BUFFER_BYTES
+
+    def readable(self):
+        """The client sent something: False when that is the end of the connection"""
+        try:
+            return bool(self.sock.recv(4096))
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+class EventBroadcaster:
+    """One thread writing Server-Sent Events to every subscriber
+
+    source(position) returns (messages, position): the sse_message()
+    bytes after a stream position and the position they lead to. Each
+    subscriber starts at its own position (a reconnecting browser's
+    Last-Event-ID) and is caught up on the next pass; subscribers at the
+    same position share one source() call. A pass runs after signal(),
+    for new subscribers and every EVENT_HEARTBEAT_SECONDS, when streams
+    with nothing to send get a heartbeat comment. Socket subscribers are
+    watched with a selector, so a client that disconnects is dropped at
+    once, and one that stops reading is dropped past EVENT_BUFFER_BYTES.
+    Other subscribers (async_server's) provide send(data) and close(),
+    and are unsubscribe()d when their client leaves.
+    """
+
+    def __init__(self, source, limit=MAX_EVENT_STREAMS):
+        self.source = source
+        self.limit = limit
+        self.subscribers = {}  # subscriber -> position, owned by the thread
+        self.lock = threading.Lock()
+        self.joining = []
+        self.leaving = []
+        self.signalled = False
+        self.thread = None
+        self.stop = None
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.wakeup_recv.setblocking(False)
+        self.wakeup_send.setblocking(False)
+
+    def has_room(self):
+        with self.lock:
+            return len(self.subscribers) + len(self.joining) < self.limit
+
+    def subscribe(self, subscriber, position):
+        """Start streaming to subscriber from position; False when full"""
+        with self.lock:
+            if len(self.subscribers) + len(self.joining) >= self.limit:
+                return False
+            self.joining.append((subscriber, position))
+            if self.thread is None:
+                self.stop = threading.Event()
+                self.thread = threading.Thread(target=self.run, args=(self.stop,), name='event-broadcaster',
+                                               daemon=True)
+                self.thread.start()
+        self.wake()
+        return True
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.leaving.append(subscriber)
+        self.wake()
+
+    def signal(self):
+        """Look for new events now (e.g. after a write commits)"""
+        with self.lock:
+            self.signalled = True
+        self.wake()
+
+    def close(self, timeout=None):
+        """End every stream and stop the thread (a new subscriber starts it again)"""
+        with self.lock:
+            thread, self.thread = self.thread, None
+            if thread is not None:
+                self.stop.set()
+        self.wake()
+        if thread is not None:
+            thread.join(timeout)
+
+    def wake(self):
+        try:
+            self.wakeup_send.send(b'\0')
+        except BlockingIOError:
+            pass  # already has wakeups pending
+
+    def run(self, stop):
+        selector = selectors.DefaultSelector()
+        selector.register(self.wakeup_recv, selectors.EVENT_READ)
+        next_heartbeat = time.monotonic() + EVENT_HEARTBEAT_SECONDS
+        try:
+            while not stop.is_set():
+                for key, events in selector.select(max(0.0, next_heartbeat - time.monotonic())):
+                    if key.fileobj is self.wakeup_recv:
+                        try:
+                            self.wakeup_recv.recv(4096)
+                        except BlockingIOError:
+                            pass
+                        continue
+                    subscriber = key.data
+                    alive = subscriber.readable() if events & selectors.EVENT_READ else True
+                    if alive and events & selectors.EVENT_WRITE:
+                        alive = subscriber.flush()
+                    self.after_write(selector, subscriber, alive)
+                
+                with self.lock:
+                    joining, self.joining = self.joining, []
+                    leaving, self.leaving = self.leaving, []
+                    signalled, self.signalled = self.signalled, False
+                for subscriber, position in joining:
+                    self.subscribers[subscriber] = position
+                    if isinstance(subscriber, SocketSubscriber):
+                        selector.register(subscriber.sock, selectors.EVENT_READ, subscriber)
+                for subscriber in leaving:
+                    self.drop(selector, subscriber)
+                
+                heartbeat = time.monotonic() >= next_heartbeat
+                if heartbeat:
+                    next_heartbeat = time.monotonic() + EVENT_HEARTBEAT_SECONDS
+                if heartbeat or signalled or joining:
+                    self.publish(selector, heartbeat)
+        finally:
+            with self.lock:
+                joining, self.joining = self.joining, []
+            for subscriber in list(self.subscribers) + [subscriber for subscriber, _ in joining]:
+                self.drop(selector, subscriber)
+            selector.close()
+
+    def publish(self, selector, heartbeat):
+        """Send every subscriber what source() has after its position"""
+        groups = {}
+        for subscriber, position in self.subscribers.items():
+            groups.setdefault(position, []).append(subscriber)
+        for position, members in groups.items():
+            try:
+                messages, next_position = self.source(position)
+            except Exception as e:
+                logger.error(f"Error reading events: {e}")
+                continue
+            data = b''.join(messages) or (b': heartbeat\n\n' if heartbeat else b'')
+            for subscriber in members:
+                self.subscribers[subscriber] = next_position
+                if data:
+                    self.after_write(selector, subscriber, subscriber.send(data))
+
+    def after_write(self, selector, subscriber, alive):
+        """Drop a dead subscriber, or watch a socket for writability while it has a backlog"""
+        if not alive:
+            self.drop(selector, subscriber)
+        elif isinstance(subscriber, SocketSubscriber):
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if subscriber.pending else 0)
+            selector.modify(subscriber.sock, events, subscriber)
+
+    def drop(self, selector, subscriber):
+        self.subscribers.pop(subscriber, None)
+        if isinstance(subscriber, SocketSubscriber):
+            try:
+                selector.unregister(subscriber.sock)
+            except (KeyError, ValueError):
+                pass  # never registered, or already closed
+        subscriber.close()
+
+class EventStreamMixin:
+    """Answer an event-stream request and hand the connection to a broadcaster
+
+    send_event_stream(broadcaster, position) sends the headers and the
+    reconnect delay, then leaves the connection to the broadcaster. The
+    socket is detached from the handler, so the server's close of it
+    does nothing; under the asyncio engine, which has no socket here, it
+    is handed over in event_subscription for async_server to follow on
+    its loop. A full broadcaster gets HTTPError 503.
+    """
+    event_subscription = None
+
+    def send_event_stream(self, broadcaster, position):
+        if not broadcaster.has_room():
+            raise HTTPError(503, 'Too many event streams open')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        if not self.close_connection:
+            # No length: the stream ends when the connection closes
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(f'retry: {EVENT_RETRY_MS}\n\n'.encode('ascii'))
+        self.close_connection = True
+        
+        connection = getattr(self, 'connection', None)
+        if connection is None:
+            self.event_subscription = (broadcaster, position)
+            return
+        self.wfile.flush()
+        subscriber = SocketSubscriber(socket.socket(fileno=connection.detach()))
+        if not broadcaster.subscribe(subscriber, position):
+            subscriber.close()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Server Tests for AMTC Lab Management System
+Runs basic-server.py's worker pool on a scratch database and checks it
+over real connections: path parameters, body limits and bad input
+answered with 4xx, ETag/304 revalidation, kept-alive connections parked
+off the workers and requeued, and the live event stream.
+
+Usage:
+    python -m unittest test_basic_server     # or: python -m pytest test_basic_server.py
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import tempfile
+import threading
+import http.client
+import importlib.util
+import unittest
+from unittest import mock
+
+database = None
+lab_http = None
+basic_server = None
+_workdir = None
+_cwd = None
+_db_file = None
+
+def setUpModule():
+    # Work in a scratch directory so the real inventory.db is never touched
+    global database, lab_http, basic_server, _workdir, _cwd, _db_file
+    _cwd = os.getcwd()
+    _workdir = tempfile.mkdtemp(prefix='amtc-test-')
+    os.chdir(_workdir)
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, script_dir)
+    import database
+    import lab_http
+    # Another test module may have imported it first, pointed at its own scratch copy
+    _db_file = database.DB_FILE
+    database.DB_FILE = os.path.join(_workdir, 'inventory.db')
+    database.migrate_database()
+
+    spec = importlib.util.spec_from_file_location('basic_server', os.path.join(script_dir, 'basic-server.py'))
+    basic_server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(basic_server)
+
+def tearDownModule():
+    basic_server.EVENTS.close(5)
+    database.close_all_connections()
+    database.DB_FILE = _db_file
+    os.chdir(_cwd)
+    shutil.rmtree(_workdir, ignore_errors=True)
+
+def make_item(item_id, **fields):
+    item = {
+        'id': item_id,
+        'ownerName': 'Test Owner',
+        'emailId': 'owner@example.com',
+        'ssoId': '100000001',
+        'objectStored': 'Sample box',
+        'uniqueId': f'TAG-{item_id}',
+        'location': 'Shelf A',
+        'timePeriod': 7,
+        'dateAdded': '2026-01-01T09:00:00',
+        'expiryDate': '2026-01-08T09:00:00',
+    }
+    item.update(fields)
+    return item
+
+def wait_for(condition, timeout=5):
+    """Poll condition() until it is true; False after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def read_response(reader):
+    """(status, body) of one Content-Length response read from a socket file"""
+    status = int(reader.readline().split()[1])
+    length = 0
+    for line in iter(reader.readline, b'\r\n'):
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, reader.read(length)
+
+class ServerTestCase(unittest.TestCase):
+    workers = 2
+
+    def setUp(self):
+        def clear(conn):
+            conn.execute('DELETE FROM inventory')
+            conn.execute('DELETE FROM archived')
+            database._mark_written('inventory', 'archived')
+        database.submit_write(clear).result(5)
+
+        class QuietHandler(basic_server.BasicLabServer):
+            def log_message(self, format, *args):
+                pass
+
+        self.server = basic_server.ThreadPoolServer(('127.0.0.1', 0), QuietHandler, self.workers, 8)
+        self.port = self.server.server_address[1]
+        thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        self.addCleanup(self.stop_server, thread)
+
+    def stop_server(self, thread):
+        self.server.shutdown()
+        self.server.server_close()
+        thread.join(5)
+
+    def connect(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        self.addCleanup(conn.close)
+        return conn
+
+    def request(self, method, path, body=None, headers=None, conn=None):
+        """(status, headers, parsed JSON or raw bytes) for one request"""
+        conn = conn or self.connect()
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        conn.request(method, path, body, dict(headers or {}, **({'Content-Type': 'application/json'}
+                                                               if body is not None else {})))
+        response = conn.getresponse()
+        data = response.read()
+        if response.getheader('Content-Type', '').startswith('application/json') and data:
+            data = json.loads(data)
+        return response.status, response, data
+
+class RoutingTest(ServerTestCase):
+    def test_path_parameter_reaches_the_handler(self):
+        database.add_item(make_item('a', uniqueId='AMTC 7/1'))
+        status, _, data = self.request('GET', '/api/items/tag/AMTC%207%2F1')
+        self.assertEqual(status, 200)
+        self.assertEqual(data['item']['id'], 'a')
+        self.assertEqual(self.request('GET', '/api/items/tag/nothing')[0], 404)
+
+    def test_body_over_the_route_limit_is_413(self):
+        conn = self.connect()
+        conn.putrequest('POST', '/api/items')
+        conn.putheader('Content-Type', 'application/json')
+        conn.putheader('Content-Length', str(lab_http.MAX_BODY_BYTES + 1))
+        conn.endheaders()
+        response = conn.getresponse()
+        self.assertEqual(response.status, 413)
+        self.assertEqual(response.getheader('Connection'), 'close')  # the unread body must not be parsed
+
+    def test_bulk_route_takes_a_larger_body(self):
+        items = [make_item(f'item-{n:04}', objectStored='x' * 1000) for n in range(1200)]
+        body = json.dumps({'items': items}).encode('utf-8')
+        self.assertGreater(len(body), lab_http.MAX_BODY_BYTES)
+        status, _, data = self.request('POST', '/api/items/import', body)
+        self.assertEqual(status, 200)
+        self.assertEqual(data['count'], 1200)
+
+    def test_bad_input_is_400(self):
+        for path in ('/api/changes?since=abc', '/api/changes?limit=x', '/api/search?q=a&limit=abc',
+                     '/api/search?q=a&offset=z', '/api/search?q=a&scope=nope', '/api/items?limit=5&after=junk',
+                     '/api/events?since=abc'):
+            self.assertEqual(self.request('GET', path)[0], 400, path)
+        for body in ([1, 2], {'items': 'abc'}):
+            self.assertEqual(self.request('POST', '/api/items/import', body)[0], 400, body)
+        self.assertEqual(self.request('POST', '/api/items', b'{not json')[0], 400)
+
+class ConditionalGetTest(ServerTestCase):
+    def test_unchanged_inventory_is_304_until_a_write(self):
+        database.add_item(make_item('a'))
+        status, response, _ = self.request('GET', '/api/items')
+        self.assertEqual(status, 200)
+        etag = response.getheader('ETag')
+        self.assertTrue(etag.startswith('W/"'))
+
+        status, response, data = self.request('GET', '/api/items', headers={'If-None-Match': etag})
+        self.assertEqual(status, 304)
+        self.assertEqual(data, b'')
+
+        self.request('POST', '/api/items', make_item('b'))
+        status, response, data = self.request('GET', '/api/items', headers={'If-None-Match': etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(response.getheader('ETag'), etag)
+        self.assertEqual(len(data['items']), 2)
+
+    def test_change_feed_is_304_until_the_log_grows(self):
+        since = database.change_version()[0]
+        database.add_item(make_item('a'))
+        path = f'/api/changes?since={since}'
+        _, response, _ = self.request('GET', path)
+        etag = response.getheader('ETag')
+        self.assertEqual(self.request('GET', path, headers={'If-None-Match': etag})[0], 304)
+        database.add_item(make_item('b'))
+        self.assertEqual(self.request('GET', path, headers={'If-None-Match': etag})[0], 200)
+
+class KeepAliveTest(ServerTestCase):
+    def test_idle_connections_do_not_hold_workers(self):
+        conns = [self.connect() for _ in range(self.workers * 3)]
+        for conn in conns:
+            self.assertEqual(self.request('GET', '/api/cache', conn=conn)[0], 200)
+        self.assertTrue(wait_for(lambda: len(self.server.idle) == len(conns)))
+
+        # Each parked connection is requeued when its next request arrives
+        for conn in reversed(conns):
+            self.assertEqual(self.request('GET', '/api/cache', conn=conn)[0], 200)
+
+    def test_pipelined_request_is_requeued_at_once(self):
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+        self.addCleanup(sock.close)
+        request = b'GET /api/cache HTTP/1.1\r\nHost: test\r\n\r\n'
+        sock.sendall(request * 2)
+        reader = sock.makefile('rb')
+        for _ in range(2):
+            self.assertEqual(read_response(reader)[0], 200)
+
+    def test_idle_connection_is_closed_after_the_timeout(self):
+        with mock.patch.object(lab_http, 'KEEPALIVE_TIMEOUT', 0.2):
+            sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+            self.addCleanup(sock.close)
+            sock.sendall(b'GET /api/cache HTTP/1.1\r\nHost: test\r\n\r\n')
+            reader = sock.makefile('rb')
+            self.assertEqual(read_response(reader)[0], 200)
+            self.assertTrue(wait_for(lambda: self.server.idle))
+            self.assertTrue(wait_for(lambda: not self.server.idle))
+        self.assertEqual(reader.read(), b'')
+
+class EventStreamTest(ServerTestCase):
+    def test_committed_write_reaches_the_stream(self):
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+        self.addCleanup(sock.close)
+        sock.sendall(b'GET /api/events HTTP/1.1\r\nHost: test\r\n\r\n')
+        data = b''
+        while b'retry:' not in data:
+            data += sock.recv(4096)
+        self.assertIn(b'text/event-stream', data)
+
+        status, _, result = self.request('POST', '/api/items', make_item('a'))
+        self.assertTrue(result['success'])
+        while b'event: added' not in data:
+            data += sock.recv(4096)
+        event = data[data.index(b'event: added'):].split(b'\n\n')[0]
+        change = json.loads(event.split(b'data: ')[1])
+        self.assertEqual((change['op'], change['id']), ('insert', 'a'))
+
+if __name__ == '__main__':
+    unittest.main()
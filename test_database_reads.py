@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Read Path Tests for AMTC Lab Management System
+Checks the read side of database.py: the read cache and its invalidation,
+the change feed and its snapshot fallback, full-text search staying in
+step with writes, keyset paging, and the relative expiry filters.
+
+Usage:
+    python -m unittest test_database_reads     # or: python -m pytest test_database_reads.py
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+database = None
+_workdir = None
+_cwd = None
+_db_file = None
+
+def setUpModule():
+    # Work in a scratch directory so the real inventory.db is never touched
+    global database, _workdir, _cwd, _db_file
+    _cwd = os.getcwd()
+    _workdir = tempfile.mkdtemp(prefix='amtc-test-')
+    os.chdir(_workdir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import database
+    # Another test module may have imported it first, pointed at its own scratch copy
+    _db_file = database.DB_FILE
+    database.DB_FILE = os.path.join(_workdir, 'inventory.db')
+    database.migrate_database()
+
+def tearDownModule():
+    database.close_all_connections()
+    database.DB_FILE = _db_file
+    os.chdir(_cwd)
+    shutil.rmtree(_workdir, ignore_errors=True)
+
+def make_item(item_id, **fields):
+    item = {
+        'id': item_id,
+        'ownerName': 'Test Owner',
+        'emailId': 'owner@example.com',
+        'ssoId': '100000001',
+        'objectStored': 'Sample box',
+        'uniqueId': f'TAG-{item_id}',
+        'location': 'Shelf A',
+        'timePeriod': 7,
+        'dateAdded': '2026-01-01T09:00:00',
+        'expiryDate': '2026-01-08T09:00:00',
+    }
+    item.update(fields)
+    return item
+
+def iso_in(hours):
+    """ISO date `hours` from now, in the UTC form the epoch columns assume"""
+    return (datetime.now(timezone.utc) + timedelta(hours=hours)).strftime('%Y-%m-%dT%H:%M:%S')
+
+class ReadTestCase(unittest.TestCase):
+    def setUp(self):
+        def clear(conn):
+            conn.execute('DELETE FROM inventory')
+            conn.execute('DELETE FROM archived')
+            database._mark_written('inventory', 'archived')
+        database.submit_write(clear).result(5)
+
+class ReadCacheTest(ReadTestCase):
+    def test_body_is_reused_until_a_write(self):
+        database.add_item(make_item('a'))
+        first = database.get_all_items_json()
+        self.assertIs(database.get_all_items_json(), first)
+
+        database.add_item(make_item('b'))
+        body = database.get_all_items_json()
+        self.assertIsNot(body, first)
+        self.assertEqual([item['id'] for item in json.loads(body)['items']], ['a', 'b'])
+
+    def test_write_changes_only_its_tables_versions(self):
+        database.add_item(make_item('a'))
+        inventory, archived = database.table_version('inventory'), database.table_version('archived')
+
+        database.update_item('a', {'location': 'Shelf B'})
+        self.assertNotEqual(database.table_version('inventory')[0], inventory[0])
+        self.assertEqual(database.table_version('archived')[0], archived[0])
+
+        inventory = database.table_version('inventory')
+        database.archive_item({'id': 'a'}, '2026-02-01T10:00:00')
+        self.assertNotEqual(database.table_version('inventory')[0], inventory[0])
+        self.assertNotEqual(database.table_version('archived')[0], archived[0])
+
+    def test_read_overlapping_a_write_is_not_cached(self):
+        select = database._select
+        def racing_select(*args, **kwargs):
+            database._invalidate(['inventory'])  # a write commits mid-read
+            return select(*args, **kwargs)
+
+        with mock.patch.object(database, '_select', racing_select):
+            database.get_all_items()
+        self.assertNotIn('inventory', database._cache)
+
+        database.get_all_items()
+        self.assertIn('inventory', database._cache)
+
+class ChangeFeedTest(ReadTestCase):
+    def test_changes_give_each_items_latest_state(self):
+        since = database.change_version()[0]
+        database.add_item(make_item('a'))
+        database.add_item(make_item('b'))
+        database.update_item('a', {'location': 'Shelf B'})
+        database.delete_item('b')
+
+        result = database.get_changes(since)
+        self.assertTrue(result['success'])
+        self.assertFalse(result['snapshot'])
+        self.assertFalse(result['hasMore'])
+        self.assertEqual(result['lastSeq'], database.change_version()[0])
+        changes = {change['id']: change for change in result['changes']}
+        self.assertEqual(changes['a']['op'], 'update')
+        self.assertEqual(changes['a']['item']['location'], 'Shelf B')
+        self.assertEqual(changes['b']['op'], 'delete')
+        self.assertIsNone(changes['b']['item'])
+
+    def test_limit_pages_through_the_log(self):
+        since = database.change_version()[0]
+        for item_id in ('a', 'b', 'c'):
+            database.add_item(make_item(item_id))
+
+        first = database.get_changes(since, limit=2)
+        self.assertTrue(first['hasMore'])
+        self.assertEqual([change['id'] for change in first['changes']], ['a', 'b'])
+        rest = database.get_changes(first['lastSeq'], limit=2)
+        self.assertFalse(rest['hasMore'])
+        self.assertEqual([change['id'] for change in rest['changes']], ['c'])
+
+    def test_no_since_gives_a_snapshot(self):
+        database.add_item(make_item('a'))
+        database.add_item(make_item('b'))
+        database.archive_item({'id': 'b'}, '2026-02-01T10:00:00')
+
+        result = database.get_changes()
+        self.assertTrue(result['snapshot'])
+        self.assertEqual([item.id for item in result['items']], ['a'])
+        self.assertEqual([item['id'] for item in result['archived']], ['b'])
+        self.assertEqual(result['lastSeq'], database.change_version()[0])
+        self.assertEqual(json.loads(database.get_changes_snapshot_json()), json.loads(database.dumps(result)))
+
+    def test_trimmed_since_falls_back_to_a_snapshot(self):
+        since = database.change_version()[0]
+        with mock.patch.object(database, 'CHANGE_LOG_SIZE', 2):
+            for item_id in ('a', 'b', 'c', 'd'):
+                database.add_item(make_item(item_id))
+        self.assertTrue(database.get_changes(since)['snapshot'])
+        self.assertTrue(database.get_changes(database.change_version()[0] + 10)['snapshot'])
+
+    def test_non_integer_since_raises(self):
+        with self.assertRaises(ValueError):
+            database.get_changes('abc')
+        with self.assertRaises(ValueError):
+            database.get_changes(0, limit='many')
+
+class SearchTest(ReadTestCase):
+    def search_ids(self, q, scope='all'):
+        result = database.search_items(q, scope=scope)
+        self.assertTrue(result['success'], result)
+        return [item.id for item in result['items']]
+
+    def test_prefix_search(self):
+        database.add_item(make_item('a', ownerName='Alice Cooper'))
+        database.add_item(make_item('b', ownerName='Bob Dylan', uniqueId='QX-4417'))
+        self.assertEqual(self.search_ids('ali'), ['a'])
+        self.assertEqual(self.search_ids('441'), ['b'])
+        self.assertEqual(self.search_ids(''), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        database.add_item(make_item('a', ownerName='Alice Cooper'))
+        database.update_item('a', {'ownerName': 'Carol King'})
+        self.assertEqual(self.search_ids('alice'), [])
+        self.assertEqual(self.search_ids('carol'), ['a'])
+
+        database.delete_item('a')
+        self.assertEqual(self.search_ids('carol'), [])
+
+    def test_scope_selects_the_table(self):
+        database.add_item(make_item('a', ownerName='Alice Cooper'))
+        database.add_item(make_item('b', ownerName='Alice Walker'))
+        database.archive_item({'id': 'b'}, '2026-02-01T10:00:00')
+        self.assertEqual(self.search_ids('alice', 'inventory'), ['a'])
+        self.assertEqual(self.search_ids('alice', 'archived'), ['b'])
+        self.assertEqual(sorted(self.search_ids('alice')), ['a', 'b'])
+
+    def test_bad_parameters_raise(self):
+        with self.assertRaises(ValueError):
+            database.search_items('alice', scope='everything')
+        with self.assertRaises(ValueError):
+            database.search_items('alice', limit='abc')
+        with self.assertRaises(ValueError):
+            database.search_items('alice', offset='abc')
+
+class PagingTest(ReadTestCase):
+    def test_pages_cover_every_item_in_order(self):
+        dates = ['2026-01-03T09:00:00', '2026-01-01T09:00:00', '2026-01-02T09:00:00', '2026-01-01T09:00:00',
+                 '2026-01-02T09:00:00', '2026-01-01T09:00:00', '2026-01-04T09:00:00']
+        items = [make_item(f'item-{n}', dateAdded=date) for n, date in enumerate(dates)]
+        database.import_items(items)
+        expected = [item['id'] for item in sorted(items, key=lambda item: (item['dateAdded'], item['id']))]
+
+        seen, after = [], None
+        while True:
+            page = database.get_items_page(3, after)
+            self.assertTrue(page['success'], page)
+            seen += [item.id for item in page['items']]
+            after = page['nextCursor']
+            if after is None:
+                break
+        self.assertEqual(seen, expected)
+
+    def test_malformed_cursor_raises(self):
+        for cursor in ('not-a-cursor', 'bnVsbA==', 'WzEsIDJd'):  # junk, null, [1, 2]
+            with self.assertRaises(ValueError):
+                database.get_items_page(10, cursor)
+        with self.assertRaises(ValueError):
+            database.get_items_page('ten')
+
+class ExpiryFilterTest(ReadTestCase):
+    def test_within_hours_filters(self):
+        database.add_item(make_item('overdue', expiryDate=iso_in(-5)))
+        database.add_item(make_item('soon', expiryDate=iso_in(5)))
+        database.add_item(make_item('later', expiryDate=iso_in(50)))
+
+        def ids(filters):
+            result = database.query_items(filters, order_by='expiryDate')
+            self.assertTrue(result['success'], result)
+            return [item.id for item in result['items']]
+
+        self.assertEqual(ids({'expiresWithinHours': 24}), ['overdue', 'soon'])
+        self.assertEqual(ids({'expiringWithinHours': 24}), ['soon'])
+        self.assertEqual(ids({}), ['overdue', 'soon', 'later'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Write Queue Tests for AMTC Lab Management System
+Checks the group-commit writer in database.py: each write's SAVEPOINT,
+errors reaching the caller's Future before write listeners are told,
+stop_writer() draining the queue, and bulk writes (import, archive
+tiering) going through the queue.
+
+Usage:
+    python -m unittest test_database_writer     # or: python -m pytest test_database_writer.py
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+database = None
+_workdir = None
+_cwd = None
+_db_file = None
+
+def setUpModule():
+    # Work in a scratch directory so the real inventory.db is never touched
+    global database, _workdir, _cwd, _db_file
+    _cwd = os.getcwd()
+    _workdir = tempfile.mkdtemp(prefix='amtc-test-')
+    os.chdir(_workdir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import database
+    # Another test module may have imported it first, pointed at its own scratch copy
+    _db_file = database.DB_FILE
+    database.DB_FILE = os.path.join(_workdir, 'inventory.db')
+    database.migrate_database()
+
+def tearDownModule():
+    database.close_all_connections()
+    database.DB_FILE = _db_file
+    os.chdir(_cwd)
+    shutil.rmtree(_workdir, ignore_errors=True)
+
+def make_item(item_id, **fields):
+    item = {
+        'id': item_id,
+        'ownerName': 'Test Owner',
+        'emailId': 'owner@example.com',
+        'ssoId': '100000001',
+        'objectStored': 'Sample box',
+        'uniqueId': f'TAG-{item_id}',
+        'location': 'Shelf A',
+        'timePeriod': 7,
+        'dateAdded': '2026-01-01T09:00:00',
+        'expiryDate': '2026-01-08T09:00:00',
+    }
+    item.update(fields)
+    return item
+
+def inventory_ids():
+    rows = database.get_connection().execute('SELECT id FROM inventory ORDER BY id')
+    return [row[0] for row in rows]
+
+class WriterTestCase(unittest.TestCase):
+    def setUp(self):
+        def clear(conn):
+            conn.execute('DELETE FROM inventory')
+            conn.execute('DELETE FROM archived')
+            database._mark_written('inventory', 'archived')
+        database.submit_write(clear).result(5)
+        self.gate = threading.Event()
+        self.addCleanup(self.gate.set)
+
+    def hold_writer(self):
+        """Occupy the writer thread until self.gate is set, so the next writes queue up as one group"""
+        started = threading.Event()
+        def wait(conn):
+            started.set()
+            self.gate.wait(10)
+        held = database.submit_write(wait)
+        self.assertTrue(started.wait(5))
+        return held
+
+class SavepointIsolationTest(WriterTestCase):
+    def test_failing_write_is_rolled_back_alone(self):
+        def add_then_fail(conn):
+            database._add_item(conn, make_item('b'))
+            raise RuntimeError('boom')
+
+        self.hold_writer()
+        first = database.submit_write(database._add_item, make_item('a'))
+        failing = database.submit_write(add_then_fail)
+        last = database.submit_write(database._add_item, make_item('c'))
+        self.gate.set()
+
+        self.assertTrue(first.result(5)['success'])
+        self.assertIsInstance(failing.exception(5), RuntimeError)
+        self.assertTrue(last.result(5)['success'])
+        self.assertEqual(inventory_ids(), ['a', 'c'])
+
+    def test_failed_batch_leaves_no_change_log_entries(self):
+        since = database.change_version()[0]
+        result = database.run_batch([
+            {'op': 'add', 'item': make_item('a')},
+            {'op': 'update', 'id': 'a', 'updates': {'id': 'renamed'}},
+        ])
+        self.assertFalse(result['committed'])
+        self.assertEqual(inventory_ids(), [])
+        self.assertEqual(database.change_version()[0], since)
+
+class ErrorPropagationTest(WriterTestCase):
+    def test_exception_reaches_future(self):
+        def fail(conn):
+            raise ValueError('bad write')
+        error = database.submit_write(fail).exception(5)
+        self.assertIsInstance(error, ValueError)
+        self.assertEqual(str(error), 'bad write')
+
+    def test_on_error_turns_exception_into_result(self):
+        def fail(conn):
+            raise ValueError('bad write')
+        future = database.submit_write(fail, on_error=lambda e: {'success': False, 'message': str(e)})
+        self.assertEqual(future.result(5), {'success': False, 'message': 'bad write'})
+
+    def test_sqlite_error_becomes_error_result(self):
+        self.assertTrue(database.add_item(make_item('a'))['success'])
+        result = database.add_item(make_item('a'))
+        self.assertFalse(result['success'])
+        self.assertIn('already exists', result['message'])
+
+    def test_listeners_run_after_futures_resolve(self):
+        seen = []
+        def listener(tables):
+            seen.append(future.done())
+        self.hold_writer()
+        future = database.add_item(make_item('a'), wait=False)
+        database.add_write_listener(listener)
+        self.addCleanup(database._write_listeners.remove, listener)
+        self.gate.set()
+        future.result(5)
+        database.submit_write(lambda conn: None).result(5)
+        self.assertEqual(seen, [True])
+
+class StopWriterTest(WriterTestCase):
+    def test_stop_writer_commits_queued_writes(self):
+        self.hold_writer()
+        futures = [database.add_item(make_item(f'item-{n:02}'), wait=False) for n in range(20)]
+
+        stopper = threading.Thread(target=database.stop_writer)
+        stopper.start()
+        self.gate.set()
+        stopper.join(10)
+
+        self.assertFalse(stopper.is_alive())
+        self.assertTrue(all(future.done() and future.result()['success'] for future in futures))
+        self.assertEqual(len(inventory_ids()), 20)
+
+    def test_writer_restarts_after_stop(self):
+        database.stop_writer()
+        self.assertTrue(database.add_item(make_item('a'))['success'])
+        self.assertEqual(inventory_ids(), ['a'])
+
+class BulkWritesTest(WriterTestCase):
+    def test_import_waits_for_the_writer(self):
+        self.hold_writer()
+        results = []
+        importer = threading.Thread(target=lambda: results.append(
+            database.import_items([make_item(f'item-{n:02}') for n in range(10)], chunk_size=4)))
+        importer.start()
+        importer.join(0.2)
+        self.assertTrue(importer.is_alive())  # queued behind the held write
+
+        self.gate.set()
+        importer.join(10)
+        self.assertEqual(results[0]['count'], 10)
+        self.assertEqual(len(inventory_ids()), 10)
+
+    def test_fail_mode_import_is_all_or_nothing(self):
+        database.add_item(make_item('taken'))
+        items = [make_item(f'item-{n:02}') for n in range(10)] + [make_item('other', uniqueId='TAG-taken')]
+        result = database.import_items(items, mode='fail', chunk_size=4)
+        self.assertFalse(result['success'])
+        self.assertEqual(inventory_ids(), ['taken'])
+
+    def test_tier_archive_moves_old_rows(self):
+        for item_id, pickup in (('old', '2020-03-01T10:00:00'), ('new', '2999-03-01T10:00:00')):
+            database.add_item(make_item(item_id))
+            database.archive_item({'id': item_id}, pickup)
+
+        result = database.tier_archive(older_than_days=365, batch_size=1)
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['moved'], 1)
+        self.assertEqual([item.id for item in database.get_all_archived()['items']], ['new'])
+
+        tier = sqlite3.connect(database._tier_path(2020))
+        try:
+            self.assertEqual(tier.execute('SELECT id FROM archived').fetchall(), [('old',)])
+        finally:
+            tier.close()
+        ranged = database.get_all_archived(since='2020-01-01T00:00:00', until='2021-01-01T00:00:00')
+        self.assertEqual([item.id for item in ranged['items']], ['old'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+HTTP Toolkit Tests for AMTC Lab Management System
+Checks the parts of lab_http.py that need no server: the Router's path
+parameters and the EventBroadcaster catching subscribers up, signalling
+them and dropping the ones that have gone.
+
+Usage:
+    python -m unittest test_lab_http     # or: python -m pytest test_lab_http.py
+"""
+
+import os
+import sys
+import time
+import socket
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import lab_http
+
+def wait_for(condition, timeout=5):
+    """Poll condition() until it is true; False after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+class RouterTest(unittest.TestCase):
+    def setUp(self):
+        self.router = lab_http.Router([
+            ('GET', '/api/items', 'handle_items'),
+            ('GET', '/api/items/tag/{unique_id}', 'handle_tag'),
+            ('POST', '/api/items/import', 'handle_import', lab_http.MAX_BULK_BODY_BYTES),
+        ])
+
+    def test_literal_path(self):
+        route, params = self.router.match('GET', '/api/items')
+        self.assertEqual(route.handler, 'handle_items')
+        self.assertEqual(params, {})
+        self.assertEqual(route.max_body, lab_http.MAX_BODY_BYTES)
+
+    def test_path_parameter_is_url_decoded(self):
+        route, params = self.router.match('GET', '/api/items/tag/AMTC%20001%2F2')
+        self.assertEqual(route.handler, 'handle_tag')
+        self.assertEqual(params, {'unique_id': 'AMTC 001/2'})
+
+    def test_parameter_matches_one_segment(self):
+        self.assertEqual(self.router.match('GET', '/api/items/tag/a/b'), (None, None))
+        self.assertEqual(self.router.match('GET', '/api/items/tag/'), (None, None))
+
+    def test_method_and_body_limit_are_per_route(self):
+        self.assertEqual(self.router.match('GET', '/api/items/import'), (None, None))
+        route, _ = self.router.match('POST', '/api/items/import')
+        self.assertEqual(route.max_body, lab_http.MAX_BULK_BODY_BYTES)
+
+    def test_stats_count_errors(self):
+        route, _ = self.router.match('GET', '/api/items')
+        self.router.record(route, 200, 0.002)
+        self.router.record(route, 500, 0.004)
+        stats = self.router.stats()['GET /api/items']
+        self.assertEqual((stats['count'], stats['errors'], stats['maxMs']), (2, 1, 4.0))
+
+class ListSubscriber:
+    """Broadcaster subscriber keeping what it is sent"""
+
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.data = b''
+        self.closed = False
+
+    def send(self, data):
+        self.data += data
+        return self.alive
+
+    def close(self):
+        self.closed = True
+
+class EventBroadcasterTest(unittest.TestCase):
+    def setUp(self):
+        self.head = 0
+        self.calls = []
+        self.broadcaster = lab_http.EventBroadcaster(self.source, limit=3)
+        self.addCleanup(self.broadcaster.close, 5)
+
+    def source(self, position):
+        self.calls.append(position)
+        head = self.head
+        return [lab_http.sse_message('item', n, n) for n in range(position + 1, head + 1)], head
+
+    def test_subscriber_is_caught_up_then_signalled(self):
+        self.head = 2
+        subscriber = ListSubscriber()
+        self.assertTrue(self.broadcaster.subscribe(subscriber, 0))
+        self.assertTrue(wait_for(lambda: b'id: 2\n' in subscriber.data))
+        self.assertIn(b'id: 1\n', subscriber.data)
+
+        self.head = 3
+        self.broadcaster.signal()
+        self.assertTrue(wait_for(lambda: b'id: 3\n' in subscriber.data))
+        self.assertEqual(subscriber.data.count(b'id: 2\n'), 1)
+
+    def test_subscribers_at_one_position_share_a_read(self):
+        self.head = 1
+        first, second = ListSubscriber(), ListSubscriber()
+        self.broadcaster.subscribe(first, 0)
+        self.broadcaster.subscribe(second, 0)
+        self.assertTrue(wait_for(lambda: first.data and second.data))
+        self.head = 2
+        self.calls.clear()
+        self.broadcaster.signal()
+        self.assertTrue(wait_for(lambda: b'id: 2\n' in first.data and b'id: 2\n' in second.data))
+        self.assertEqual(self.calls, [1])
+
+    def test_failed_send_drops_the_subscriber(self):
+        self.head = 1
+        subscriber = ListSubscriber(alive=False)
+        self.broadcaster.subscribe(subscriber, 0)
+        self.assertTrue(wait_for(lambda: subscriber.closed))
+        self.assertTrue(wait_for(lambda: subscriber not in self.broadcaster.subscribers))
+
+    def test_unsubscribe_closes(self):
+        subscriber = ListSubscriber()
+        self.broadcaster.subscribe(subscriber, 0)
+        self.broadcaster.unsubscribe(subscriber)
+        self.assertTrue(wait_for(lambda: subscriber.closed))
+
+    def test_full_broadcaster_refuses(self):
+        for _ in range(3):
+            self.assertTrue(self.broadcaster.subscribe(ListSubscriber(), 0))
+        self.assertFalse(self.broadcaster.has_room())
+        self.assertFalse(self.broadcaster.subscribe(ListSubscriber(), 0))
+
+    def test_close_ends_every_stream(self):
+        subscribers = [ListSubscriber(), ListSubscriber()]
+        for subscriber in subscribers:
+            self.broadcaster.subscribe(subscriber, 0)
+        self.broadcaster.close(5)
+        self.assertTrue(all(subscriber.closed for subscriber in subscribers))
+
+    def test_socket_subscriber_dropped_when_client_disconnects(self):
+        self.head = 1
+        server_side, client_side = socket.socketpair()
+        self.addCleanup(client_side.close)
+        subscriber = lab_http.SocketSubscriber(server_side)
+        self.broadcaster.subscribe(subscriber, 0)
+        client_side.settimeout(5)
+        self.assertIn(b'id: 1\n', client_side.recv(4096))
+
+        client_side.close()
+        self.assertTrue(wait_for(lambda: subscriber not in self.broadcaster.subscribers))
+        self.assertEqual(server_side.fileno(), -1)
+
+if __name__ == '__main__':
+    unittest.main()